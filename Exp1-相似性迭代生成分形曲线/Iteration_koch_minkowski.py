@@ -1,5 +1,6 @@
 import numpy as np
-import matplotlib.pyplot as plt
+
+import instrumentation
 
 # 科赫曲线生成函数
 def koch_generator(u, level):
@@ -37,6 +38,8 @@ def koch_generator(u, level):
         
         # 更新点序列
         u = np.array(new_u)
+        if instrumentation.enabled:
+            instrumentation.observe('koch.points', len(u))
     
     return u
 
@@ -81,10 +84,15 @@ def minkowski_generator(u, level):
         
         # 更新点序列
         u = np.array(new_u)
+        if instrumentation.enabled:
+            instrumentation.observe('minkowski.points', len(u))
     
     return u
 
 if __name__ == "__main__":
+    # 绘图库只在作为脚本运行时才导入，计算函数不依赖matplotlib
+    import matplotlib.pyplot as plt
+
     # 初始线段
     init_u = np.array([0, 1], dtype=complex)
     
@@ -6,8 +6,10 @@ import unittest
 
 # 添加父目录到路径，以便导入学生代码
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # 仪表模块instrumentation
 #from solution.Iteration_koch_minkowski_solution import koch_generator, minkowski_generator
 from Iteration_koch_minkowski import koch_generator, minkowski_generator
+import instrumentation
 
 class TestFractalCurves(unittest.TestCase):
     def test_koch_generator_level1(self):
@@ -38,5 +40,12 @@ class TestFractalCurves(unittest.TestCase):
         self.assertIsInstance(points, np.ndarray)
         self.assertEqual(len(points), 90)  # 修改为90
 
+    def test_instrumentation(self):
+        """仪表开启时记录每层迭代后的点数"""
+        with instrumentation.Collector() as stats:
+            koch_generator(np.array([0, 1]), 2)
+        self.assertEqual(stats.observations['koch.points'], [5, 20])
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,6 +1,9 @@
-import matplotlib.pyplot as plt
 import math
 
+import numpy as np
+
+import instrumentation
+
 
 def apply_rules(axiom, rules, iterations):
     """
@@ -17,9 +20,101 @@ def apply_rules(axiom, rules, iterations):
             # 如果字符在规则字典中，使用规则替换；否则保持原样
             next_seq.append(rules.get(char, char))
         current = ''.join(next_seq)
+        if instrumentation.enabled:
+            instrumentation.observe('apply_rules.length', len(current))
     return current
 
 
+def _turtle_paths(commands, angle_deg, step, initial_pos, initial_angle, tree_mode, merge):
+    """
+    海龟几何的公共部分：把命令转换为折线
+    :return: 折线列表，每条折线是顶点(x, y)的列表
+
+    连续的绘制命令连成一条折线，遇到 [ 、 ] 或 f 时断开。
+    merge为True时，方向相同的连续移动合并为一条线段(只移动折线的末端顶点)。
+    """
+    x, y = initial_pos
+    current_angle = initial_angle
+    stack = []
+    paths = []
+    path = None  # 当前正在延伸的折线
+    path_angle = None  # 当前折线最后一段的方向
+    for cmd in commands:
+        if cmd in ('F', '0', '1'):
+            # 计算新的位置
+            nx = x + step * math.cos(math.radians(current_angle))
+            ny = y + step * math.sin(math.radians(current_angle))
+            if path is None:
+                path = [(x, y)]
+                paths.append(path)
+            elif merge and abs((current_angle - path_angle + 180) % 360 - 180) < 1e-9:
+                path.pop()  # 与上一段共线，延长上一段
+            path.append((nx, ny))
+            path_angle = current_angle
+            x, y = nx, ny
+        elif cmd == 'f':
+            # 移动但不绘制
+            x += step * math.cos(math.radians(current_angle))
+            y += step * math.sin(math.radians(current_angle))
+            path = None
+        elif cmd == '+':
+            # 顺时针旋转
+            current_angle += angle_deg
+        elif cmd == '-':
+            # 逆时针旋转
+            current_angle -= angle_deg
+        elif cmd == '[':
+            # 保存当前状态
+            stack.append((x, y, current_angle))
+            if tree_mode:
+                current_angle += angle_deg
+            path = None
+        elif cmd == ']':
+            if not stack:
+                raise ValueError("Stack is empty when trying to pop. Check the L-System commands.")
+            # 恢复之前保存的状态
+            x, y, current_angle = stack.pop()
+            if tree_mode:
+                current_angle -= angle_deg
+            path = None
+    return paths
+
+
+def l_system_segments(commands, angle_deg, step, initial_pos=(0, 0), initial_angle=90, tree_mode=False,
+                      merge=False):
+    """
+    L-System 海龟几何：只计算线段，不绘图
+    :param commands: 命令字符串
+    :param angle_deg: 每次转向的角度（度）
+    :param step: 步长
+    :param initial_pos: 初始位置
+    :param initial_angle: 初始方向（度）
+    :param tree_mode: 是否使用分形树模式（影响 [ 和 ] 的行为）
+    :param merge: 是否把方向相同的连续移动合并为一条线段
+    :return: 形状为(n, 4)的数组，每行是一条线段(x0, y0, x1, y1)
+    """
+    paths = _turtle_paths(commands, angle_deg, step, initial_pos, initial_angle, tree_mode, merge)
+    segments = [start + end for path in paths for start, end in zip(path, path[1:])]
+    return np.array(segments, dtype=float).reshape(-1, 4)
+
+
+def l_system_polylines(commands, angle_deg, step, initial_pos=(0, 0), initial_angle=90, tree_mode=False,
+                       merge=True):
+    """
+    L-System 海龟几何：把相连的线段串成折线
+    :param commands: 命令字符串
+    :param angle_deg: 每次转向的角度（度）
+    :param step: 步长
+    :param initial_pos: 初始位置
+    :param initial_angle: 初始方向（度）
+    :param tree_mode: 是否使用分形树模式（影响 [ 和 ] 的行为）
+    :param merge: 是否把方向相同的连续移动合并为一条线段
+    :return: 折线列表，每条折线是形状为(k, 2)的顶点数组；折线在 [ 、 ] 和 f 处断开
+    """
+    paths = _turtle_paths(commands, angle_deg, step, initial_pos, initial_angle, tree_mode, merge)
+    return [np.array(path, dtype=float) for path in paths]
+
+
 def draw_l_system(commands, angle_deg, step, initial_pos=(0, 0), initial_angle=90, tree_mode=False, savefile=None):
     """
     L-System 绘图函数
@@ -31,41 +126,17 @@ def draw_l_system(commands, angle_deg, step, initial_pos=(0, 0), initial_angle=9
     :param tree_mode: 是否使用分形树模式（影响 [ 和 ] 的行为）
     :param savefile: 如果指定，将绘图保存到该文件
     """
-    x, y = initial_pos
-    current_angle = initial_angle
-    stack = []
+    import matplotlib.pyplot as plt  # 首次绘图时才导入
+
     fig, ax = plt.subplots()
     try:
-        for cmd in commands:
-            if cmd in ('F', '0', '1'):
-                # 计算新的位置
-                nx = x + step * math.cos(math.radians(current_angle))
-                ny = y + step * math.sin(math.radians(current_angle))
-                # 绘制线段
-                ax.plot([x, nx], [y, ny], color='green' if tree_mode else 'blue', linewidth=1.2 if tree_mode else 1)
-                x, y = nx, ny
-            elif cmd == 'f':
-                # 移动但不绘制
-                x += step * math.cos(math.radians(current_angle))
-                y += step * math.sin(math.radians(current_angle))
-            elif cmd == '+':
-                # 顺时针旋转
-                current_angle += angle_deg
-            elif cmd == '-':
-                # 逆时针旋转
-                current_angle -= angle_deg
-            elif cmd == '[':
-                # 保存当前状态
-                stack.append((x, y, current_angle))
-                if tree_mode:
-                    current_angle += angle_deg
-            elif cmd == ']':
-                if not stack:
-                    raise ValueError("Stack is empty when trying to pop. Check the L-System commands.")
-                # 恢复之前保存的状态
-                x, y, current_angle = stack.pop()
-                if tree_mode:
-                    current_angle -= angle_deg
+        polylines = l_system_polylines(commands, angle_deg, step, initial_pos, initial_angle, tree_mode)
+        if polylines:
+            # 所有折线用NaN隔开，一次plot调用画完
+            gap = np.full((1, 2), np.nan)
+            points = np.concatenate([part for line in polylines for part in (line, gap)])
+            ax.plot(points[:, 0], points[:, 1], color='green' if tree_mode else 'blue',
+                    linewidth=1.2 if tree_mode else 1)
         # 设置坐标轴比例和隐藏坐标轴
         ax.set_aspect('equal')
         ax.axis('off')
@@ -81,6 +152,8 @@ def draw_l_system(commands, angle_deg, step, initial_pos=(0, 0), initial_angle=9
 
 
 def main():
+    import matplotlib.pyplot as plt
+
     # Koch 曲线参数
     koch_axiom = "F"
     koch_rules = {'F': 'F+F--F+F'}
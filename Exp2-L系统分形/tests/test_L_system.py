@@ -7,12 +7,16 @@ import os
 import sys
 from pathlib import Path
 import shutil
+import numpy as np
 import matplotlib.pyplot as plt  # 添加这行导入
 
 # 添加父目录到路径，以便导入学生代码
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # 仪表模块instrumentation
 #from solution.L_system_solution import apply_rules, draw_l_system  # 从solution文件夹中导入
 from L_system import apply_rules, draw_l_system                    # 从当前文件夹中导入
+from L_system import l_system_segments, l_system_polylines
+import instrumentation
 
 
 
@@ -63,6 +67,43 @@ class TestLSystem(unittest.TestCase):
         finally:
             plt.close('all')
 
+    def test_l_system_segments(self):
+        """海龟几何：线段数量与绘制命令数一致，分支结束后回到保存的位置"""
+        segments = l_system_segments("F+F--F+F", 60, 1, initial_angle=0)
+        self.assertEqual(segments.shape, (4, 4))
+        self.assertAlmostEqual(segments[-1, 2], 3.0)
+        self.assertAlmostEqual(segments[-1, 3], 0.0)
+        commands = apply_rules("0", {"1": "11", "0": "1[0]0"}, 3)
+        tree = l_system_segments(commands, 45, 1, tree_mode=True)
+        self.assertEqual(len(tree), commands.count("0") + commands.count("1"))
+        with self.assertRaises(ValueError):
+            l_system_segments("F]", 45, 1)
+
+    def test_merge_and_polylines(self):
+        """共线的连续移动合并为一条线段，折线在 [ 、 ] 和 f 处断开，覆盖的路径不变"""
+        merged = l_system_segments("FF+F-FF", 25.7, 1, initial_angle=0, merge=True)
+        self.assertEqual(len(merged), 3)
+        np.testing.assert_allclose(merged[0], [0, 0, 2, 0])
+        commands = apply_rules("0", {"1": "11", "0": "1[0]0"}, 6)
+        plain = l_system_segments(commands, 45, 1, tree_mode=True)
+        merged = l_system_segments(commands, 45, 1, tree_mode=True, merge=True)
+        self.assertLess(len(merged) * 2, len(plain))
+        length = lambda s: np.hypot(s[:, 2] - s[:, 0], s[:, 3] - s[:, 1]).sum()
+        self.assertAlmostEqual(length(merged), length(plain))
+        polylines = l_system_polylines("F+F[F]FfF", 90, 1, initial_angle=0, merge=False)
+        self.assertEqual([len(line) for line in polylines], [3, 2, 2, 2])
+        np.testing.assert_allclose(polylines[0], [[0, 0], [1, 0], [1, 1]])
+
+    def test_instrumentation(self):
+        """仪表开启时记录每次重写后的字符串长度"""
+        with instrumentation.Collector() as stats:
+            result = apply_rules("F", {"F": "F+F--F+F"}, 3)
+        self.assertEqual(stats.observations["apply_rules.length"], [8, 36, 148])
+        self.assertEqual(len(result), 148)
+        apply_rules("F", {"F": "F+F--F+F"}, 1)
+        self.assertEqual(len(stats.observations["apply_rules.length"]), 3)
+
+
     @classmethod
     def tearDownClass(cls):
         if test_out_dir.exists():
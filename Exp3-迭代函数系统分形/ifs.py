@@ -1,5 +1,6 @@
 import numpy as np
-import matplotlib.pyplot as plt
+
+import instrumentation
 
 def get_fern_params():
     """
@@ -56,16 +57,20 @@ def run_ifs(ifs_params, num_points=100000, num_skip=100):
     probs = [param[6] for param in ifs_params]
     indices = np.arange(len(ifs_params))
 
-    for i in range(num_points + num_skip):
-        # 随机选择变换
-        r = np.random.random()
-        idx = np.random.choice(indices, p=probs)
-        point = apply_transform(point, ifs_params[idx])
+    with instrumentation.stage('run_ifs'):
+        for i in range(num_points + num_skip):
+            # 随机选择变换
+            r = np.random.random()
+            idx = np.random.choice(indices, p=probs)
+            point = apply_transform(point, ifs_params[idx])
 
-        # 跳过前num_skip个点
-        if i >= num_skip:
-            points[i - num_skip] = point
+            # 跳过前num_skip个点
+            if i >= num_skip:
+                points[i - num_skip] = point
 
+    if instrumentation.enabled:
+        instrumentation.count('run_ifs.points_generated', num_points)
+        instrumentation.count('run_ifs.burn_in_discarded', num_skip)
     return points
 
 
@@ -75,6 +80,8 @@ def plot_ifs(points, title="IFS Fractal"):
     :param points: 点坐标数组
     :param title: 图像标题
     """
+    import matplotlib.pyplot as plt  # 首次绘图时才导入
+
     plt.figure(figsize=(8, 8))
     plt.scatter(points[:, 0], points[:, 1], s=0.1, color='green', marker='.')
     plt.title(title)
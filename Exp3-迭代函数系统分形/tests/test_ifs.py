@@ -6,9 +6,11 @@ import numpy as np
 
 # 添加父目录到路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # 仪表模块instrumentation
 
 # 导入学生代码或参考代码
 from ifs import get_fern_params, get_tree_params, apply_transform, run_ifs
+import instrumentation
 #from solution.ifs_solution import get_fern_params, get_tree_params, apply_transform, run_ifs
 
 class TestIFS(unittest.TestCase):
@@ -55,5 +57,20 @@ class TestIFS(unittest.TestCase):
         self.assertIsInstance(points, np.ndarray)
         self.assertEqual(points.shape, (1000, 2))
 
+    def test_instrumentation(self):
+        """仪表开启时统计生成点数和丢弃的预热点数"""
+        events = []
+        callback = lambda *event: events.append(event)
+        instrumentation.register_callback(callback)
+        try:
+            run_ifs(get_fern_params(), num_points=500, num_skip=50)
+        finally:
+            instrumentation.unregister_callback(callback)
+        self.assertIn(('count', 'run_ifs.points_generated', 500), events)
+        self.assertIn(('count', 'run_ifs.burn_in_discarded', 50), events)
+        self.assertEqual([e[1] for e in events if e[0] == 'time'], ['run_ifs'])
+        self.assertFalse(instrumentation.enabled)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
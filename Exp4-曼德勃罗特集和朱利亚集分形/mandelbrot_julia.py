@@ -1,81 +1,1356 @@
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import time
+import zlib
+
 import numpy as np
-import matplotlib.pyplot as plt
+
+import instrumentation
+
+
+# 默认计算区域 (xmin, xmax, ymin, ymax)
+MANDELBROT_BOUNDS = (-2.0, 1.0, -1.5, 1.5)
+JULIA_BOUNDS = (-2.0, 2.0, -2.0, 2.0)
+
+
+def complex_grid(width, height, bounds):
+    """
+    生成复平面上的网格
+    :param width: 网格宽度(像素)
+    :param height: 网格高度(像素)
+    :param bounds: 计算区域(xmin, xmax, ymin, ymax)
+    :return: 形状为(height, width)的复数数组，与np.meshgrid的结果一致
+    """
+    xmin, xmax, ymin, ymax = bounds
+    x = np.linspace(xmin, xmax, width)
+    y = np.linspace(ymin, ymax, height)
+    # 利用广播代替meshgrid，避免先生成两个实数网格再合并
+    return x[np.newaxis, :] + 1j * y[:, np.newaxis]
+
+
+def _integer_power(z, d):
+    """用平方-乘法链计算z**d(d为正整数)，只做乘法，不走通用的复数幂运算"""
+    result = None
+    while True:
+        if d & 1:
+            result = z if result is None else result * z
+        d >>= 1
+        if not d:
+            return result
+        z = z * z
+
+
+class IterationFamily:
+    """
+    逃逸时间迭代族
+
+    step(z, c)给出下一次迭代值，active(z)给出仍需继续迭代的点(布尔数组)。
+    逃逸时间核(_escape_iterate)只依赖这两个函数，存活点的压缩等优化对所有迭代族通用。
+    """
+
+    def __init__(self, step, active, name='', roots=None):
+        """
+        :param step: 迭代函数step(z, c)
+        :param active: 判定函数active(z)，False表示该点已结束(逃逸或收敛)
+        :param name: 名称
+        :param roots: 牛顿迭代族的多项式根，其他迭代族为None
+        """
+        self.step = step
+        self.active = active
+        self.name = name
+        self.roots = roots
+
+    @staticmethod
+    def _bounded(radius):
+        r2 = float(radius) ** 2
+        return lambda z: z.real ** 2 + z.imag ** 2 <= r2  # 不需要开方
+
+    @classmethod
+    def power(cls, d=2, radius=2.0):
+        """z = z^d + c (d=2即Mandelbrot/Julia集，d>2为Multibrot集)"""
+        if int(d) != d or d < 2:
+            raise ValueError(f"The power must be an integer >= 2, got {d}.")
+        d = int(d)
+        def step(z, c):
+            # z^d总是新数组，原地加上c，少一个与z同样大小的临时数组
+            w = z * z if d == 2 else _integer_power(z, d)
+            w += c
+            return w
+        return cls(step, cls._bounded(radius), 'mandelbrot' if d == 2 else f'multibrot{d}')
+
+    @classmethod
+    def burning_ship(cls, radius=2.0):
+        """z = (|Re z| + i|Im z|)^2 + c"""
+        def step(z, c):
+            x, y = np.abs(z.real), np.abs(z.imag)
+            return (x * x - y * y + 2j * x * y) + c
+        return cls(step, cls._bounded(radius), 'burning_ship')
+
+    @classmethod
+    def tricorn(cls, radius=2.0):
+        """z = conj(z)^2 + c"""
+        def step(z, c):
+            z = np.conj(z)
+            return z * z + c
+        return cls(step, cls._bounded(radius), 'tricorn')
+
+    @classmethod
+    def newton(cls, coefficients, tol=1e-6):
+        """
+        多项式p的牛顿迭代 z = z - p(z)/p'(z)，参数c不参与迭代
+        :param coefficients: 多项式系数，从最高次项开始(与np.roots相同)
+        :param tol: 与某个根的距离小于tol即视为收敛
+        """
+        coefficients = np.asarray(coefficients, dtype=np.complex128)
+        if coefficients.size < 2 or coefficients[0] == 0:
+            raise ValueError("The polynomial must have degree >= 1 with a nonzero leading coefficient.")
+        roots = np.roots(coefficients)
+        tol2 = tol * tol
+
+        def step(z, c):
+            # Horner法同时计算p(z)和p'(z)；p'(z) = 0处得到inf/nan，这些点不再收敛，计满max_iter
+            with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                p = np.full_like(z, coefficients[0])
+                dp = np.zeros_like(z)
+                for a in coefficients[1:]:
+                    dp = dp * z + p
+                    p = p * z + a
+                return z - p / dp
+
+        def active(z):
+            converged = np.zeros(z.shape, dtype=bool)
+            for r in roots:
+                d = z - r
+                converged |= d.real ** 2 + d.imag ** 2 < tol2
+            return ~converged
+
+        return cls(step, active, 'newton', roots)
+
+    @classmethod
+    def power_with_derivative(cls, d=2, radius=1000.0, plane='parameter'):
+        """
+        z = z^d + c，同时携带导数
+        迭代值是形状为(n, 2)的数组，第0列为z，第1列为导数：
+        plane='parameter'时为dz/dc (dz' = d z^(d-1) dz + 1，初值0)，
+        plane='julia'时为dz/dz0 (dz' = d z^(d-1) dz，初值1)。
+        距离估计需要较大的逃逸半径radius。
+        """
+        if int(d) != d or d < 2:
+            raise ValueError(f"The power must be an integer >= 2, got {d}.")
+        if plane not in ('parameter', 'julia'):
+            raise ValueError(f"Unknown plane: {plane}")
+        d = int(d)
+        shift = 1.0 if plane == 'parameter' else 0.0
+        r2 = float(radius) ** 2
+
+        def step(state, c):
+            z, dz = state[:, 0], state[:, 1]
+            z_d1 = z if d == 2 else _integer_power(z, d - 1)
+            out = np.empty_like(state)
+            out[:, 1] = d * z_d1 * dz + shift
+            out[:, 0] = z_d1 * z + c
+            return out
+
+        def active(state):
+            z = state[:, 0]
+            return z.real ** 2 + z.imag ** 2 <= r2
+
+        return cls(step, active, f'power{d}_derivative')
+
+
+MANDELBROT_FAMILY = IterationFamily.power(2)
+
+
+def _escape_iterate(Z, C, B, live, n_iter, family=MANDELBROT_FAMILY):
+    """
+    对尚未逃逸的点推进n_iter次迭代(默认z = z^2 + c)
+    :param Z: 一维复数数组，当前迭代值(原地更新)
+    :param C: 与Z等长的一维复数数组、复数标量，或函数C(index)，返回索引index处各点的c
+              (用于不必为每个点都保存一份c的情形，如批量Julia集)
+    :param B: 一维整数数组，逃逸时间计数(原地更新)
+    :param live: 尚未逃逸点在Z中的索引
+    :param n_iter: 本次推进的迭代次数
+    :param family: 迭代族(IterationFamily)
+    :return: 推进后仍未逃逸点的索引
+
+    只对存活点做计算：每当有点逃逸，就把它的Z和计数写回并从工作数组中剔除，
+    因此后续迭代的代价只与剩余点数成正比。
+    """
+    # 所有点都存活时live就是0..n-1，直接引用Z和C而不复制；z和c之后只会被重新赋值，不会原地修改
+    full = live.size == len(Z)
+    z = Z if full else Z[live]
+    if callable(C):
+        c = C(live)
+    else:
+        c = C if np.ndim(C) == 0 or full else C[live]
+    start_live = live.size
+    executed = 0
+    for j in range(n_iter):
+        executed += len(z)
+        mask = family.active(z)
+        if not mask.all():
+            escaped = ~mask
+            done = live[escaped]
+            Z[done] = z[escaped]  # 与原实现一致：逃逸点的Z停留在逃逸时的值
+            B[done] += j  # 逃逸点在本次推进中存活了j次迭代
+            live = live[mask]
+            z = z[mask]
+            if np.ndim(c) != 0:
+                c = c[mask]
+            if live.size == 0:
+                break
+        z = family.step(z, c)
+    Z[live] = z
+    B[live] += n_iter  # 全程未逃逸的点计满n_iter次
+    if instrumentation.enabled:
+        instrumentation.count('escape_time.iterations_executed', executed)
+        instrumentation.count('escape_time.iterations_skipped', start_live * n_iter - executed)
+    return live
 
 
-def generate_mandelbrot(width=800, height=800, max_iter=100):
+def escape_time(Z0, C, max_iter, family=MANDELBROT_FAMILY):
+    """
+    计算任意形状网格的逃逸时间
+    :param Z0: 初始值数组
+    :param C: 参数c，可以是与Z0同形的数组或复数标量
+    :param max_iter: 最大迭代次数
+    :param family: 迭代族(IterationFamily)，默认z = z^2 + c
+    :return: 与Z0同形的整数数组，包含每个点的逃逸时间
+    """
+    Z = np.array(Z0, dtype=np.complex128).ravel()  # 复制一份，迭代时原地更新
+    if np.ndim(C) != 0:
+        C = np.broadcast_to(np.asarray(C, dtype=np.complex128), np.shape(Z0)).ravel()
+    B = np.zeros(Z.size, dtype=int)
+    with instrumentation.stage('escape_time'):
+        _escape_iterate(Z, C, B, np.arange(Z.size), max_iter, family)
+    return B.reshape(np.shape(Z0))
+
+
+class EscapeTimeIterator:
+    """
+    可分步推进的逃逸时间迭代状态
+
+    保存Z、C、逃逸时间计数和尚未逃逸点的索引，每次调用advance继续迭代若干次，
+    随时可以用image()取出当前结果。用于先显示粗略结果再逐步细化，
+    或在服务端限制每个请求的计算时间。
+    """
+
+    def __init__(self, Z, C, shape, counts=None, live=None, iterations=0, family=MANDELBROT_FAMILY):
+        """
+        :param Z: 一维复数数组，当前迭代值
+        :param C: 与Z等长的一维复数数组，或复数标量
+        :param shape: 网格形状(height, width)
+        :param counts: 逃逸时间计数，默认全为0
+        :param live: 尚未逃逸点的索引，默认全部点
+        :param iterations: 已经完成的迭代次数
+        :param family: 迭代族(IterationFamily)
+        """
+        self.Z = Z
+        self.C = C
+        self.shape = shape
+        self.counts = np.zeros(Z.size, dtype=int) if counts is None else counts
+        self.live = np.arange(Z.size) if live is None else live
+        self.iterations = iterations
+        self.family = family
+
+    @classmethod
+    def mandelbrot(cls, width=800, height=800, bounds=MANDELBROT_BOUNDS, family=MANDELBROT_FAMILY):
+        """创建Mandelbrot集(参数平面)的迭代状态"""
+        C = complex_grid(width, height, bounds)
+        return cls(np.zeros(C.size, dtype=C.dtype), C.ravel(), C.shape, family=family)
+
+    @classmethod
+    def julia(cls, c, width=800, height=800, bounds=JULIA_BOUNDS, family=MANDELBROT_FAMILY):
+        """创建Julia集(动力平面)的迭代状态"""
+        Z = complex_grid(width, height, bounds)
+        return cls(Z.ravel(), complex(c), Z.shape, family=family)
+
+    @property
+    def done(self):
+        """所有点是否都已逃逸"""
+        return self.live.size == 0
+
+    def advance(self, n_iter, time_budget=None, chunk=10):
+        """
+        继续迭代
+        :param n_iter: 最多推进的迭代次数
+        :param time_budget: 可选的时间预算(秒)，用完后提前返回
+        :param chunk: 有时间预算时，每检查一次时间之间推进的迭代次数
+        :return: 实际推进的迭代次数
+        """
+        if time_budget is None:
+            chunk = n_iter
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+        advanced = 0
+        while advanced < n_iter:
+            step = min(chunk, n_iter - advanced)
+            self.live = _escape_iterate(self.Z, self.C, self.counts, self.live, step, self.family)
+            advanced += step
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+        self.iterations += advanced
+        return advanced
+
+    def refine(self, max_iter, step=50, time_budget=None):
+        """
+        逐步迭代到max_iter，每推进step次产出一张中间图像
+        :param max_iter: 最终的迭代次数
+        :param step: 每张中间图像之间的迭代次数
+        :param time_budget: 可选的总时间预算(秒)，用完后停止
+        :return: 生成器，依次产出当前图像
+        """
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+        while self.iterations < max_iter:
+            remaining = None if deadline is None else deadline - time.perf_counter()
+            if remaining is not None and remaining <= 0:
+                break
+            self.advance(min(step, max_iter - self.iterations), time_budget=remaining)
+            yield self.image()
+
+    def image(self):
+        """
+        当前的逃逸时间图像
+        :return: 2D numpy数组，与用max_iter=self.iterations调用generate_mandelbrot/generate_julia的结果相同
+        """
+        return self.counts.reshape(self.shape).T.copy()
+
+
+def generate_mandelbrot(width=800, height=800, max_iter=100, bounds=MANDELBROT_BOUNDS):
     """
     生成Mandelbrot集数据
     :param width: 图像宽度(像素)
     :param height: 图像高度(像素)
     :param max_iter: 最大迭代次数
+    :param bounds: 计算区域(xmin, xmax, ymin, ymax)，默认x在[-2, 1]，y在[-1.5, 1.5]
     :return: 2D numpy数组，包含每个点的逃逸时间
 
     实现步骤:
-    1. 创建x(-2.0到1.0)和y(-1.5到1.5)的线性空间
-    2. 生成复数网格C
-    3. 初始化Z和B数组
-    4. 迭代计算逃逸时间
+    1. 在计算区域上生成复数网格C
+    2. Z初始化为0
+    3. 迭代计算逃逸时间
     """
-    # 创建x和y的线性空间，定义Mandelbrot集的计算区域
-    x = np.linspace(-2.0, 1.0, width)  # x轴范围：[-2, 1]
-    y = np.linspace(-1.5, 1.5, height)  # y轴范围：[-1.5, 1.5]
-
-    # 使用np.meshgrid生成网格，将x和y组合成二维坐标
-    X, Y = np.meshgrid(x, y)
-
     # 构建复数矩阵C = x + iy，这里C代表参数c的网格
-    C = X + 1j * Y  # 1j是Python中的虚数单位i
+    C = complex_grid(width, height, bounds)
 
-    # 初始化Z和B数组
-    Z = np.zeros_like(C)  # Z初始化为0，因为Mandelbrot集从z0=0开始迭代
-    B = np.zeros_like(C, dtype=int)  # B记录每个点的逃逸时间（迭代次数）
+    # Z初始化为0，因为Mandelbrot集从z0=0开始迭代
+    Z = np.zeros_like(C)
 
-    # 迭代计算逃逸时间
-    for j in range(max_iter):
-        mask = np.abs(Z) <= 2  # 创建布尔掩码，标记尚未逃逸的点（|Z| <= 2）
-        Z[mask] = Z[mask] ** 2 + C[mask]  # 对未逃逸的点应用迭代公式z = z^2 + c
-        B += mask  # 未逃逸的点迭代次数加1（True值为1，False值为0）
+    # 迭代计算逃逸时间，B记录每个点的逃逸时间（迭代次数）
+    B = escape_time(Z, C, max_iter)
 
     # 返回转置后的结果，使数组方向与图像坐标系匹配
     return B.T
 
 
-def generate_julia(c, width=800, height=800, max_iter=100):
+def generate_julia(c, width=800, height=800, max_iter=100, bounds=JULIA_BOUNDS):
     """
     生成Julia集数据
     :param c: Julia集参数(复数)
     :param width: 图像宽度(像素)
     :param height: 图像高度(像素)
     :param max_iter: 最大迭代次数
+    :param bounds: 计算区域(xmin, xmax, ymin, ymax)，默认x和y都在[-2, 2]
     :return: 2D numpy数组，包含每个点的逃逸时间
 
     实现步骤:
-    1. 创建x和y的线性空间(-2.0到2.0)
-    2. 生成复数网格Z0
-    3. 初始化记录数组
-    4. 迭代计算逃逸时间
+    1. 在计算区域上生成复数网格Z0
+    2. 迭代计算逃逸时间(c固定)
     """
-    # 创建x和y的线性空间，定义Julia集的计算区域
-    x = np.linspace(-2.0, 2.0, width)  # x轴范围：[-2, 2]
-    y = np.linspace(-2.0, 2.0, height)  # y轴范围：[-2, 2]
+    # 构建复数矩阵Z0 = x + iy，这里Z0代表初始值z0的网格
+    Z = complex_grid(width, height, bounds)
 
-    # 使用np.meshgrid生成网格，将x和y组合成二维坐标
-    X, Y = np.meshgrid(x, y)
+    # 迭代计算逃逸时间，B记录每个点的逃逸时间（迭代次数）
+    B = escape_time(Z, c, max_iter)
 
-    # 构建复数矩阵Z0 = x + iy，这里Z0代表初始值z0的网格
-    Z = X + 1j * Y  # Z初始化为网格点本身
+    # 返回转置后的结果，使数组方向与图像坐标系匹配
+    return B.T
+
+
+def generate_escape_fractal(family, width=800, height=800, max_iter=100, bounds=MANDELBROT_BOUNDS, c=None):
+    """
+    用任意迭代族生成逃逸时间分形
+    :param family: IterationFamily，或'mandelbrot'、'burning_ship'、'tricorn'之一
+    :param width: 图像宽度(像素)
+    :param height: 图像高度(像素)
+    :param max_iter: 最大迭代次数
+    :param bounds: 计算区域(xmin, xmax, ymin, ymax)
+    :param c: 给出时生成Julia型图像(z0为网格，c固定)；默认生成参数平面图像(z0 = 0，c为网格)
+    :return: 2D numpy数组，包含每个点的逃逸时间(方向与generate_mandelbrot相同)
+    """
+    if isinstance(family, str):
+        constructors = {'mandelbrot': IterationFamily.power, 'burning_ship': IterationFamily.burning_ship,
+                        'tricorn': IterationFamily.tricorn}
+        if family not in constructors:
+            raise ValueError(f"Unknown fractal type: {family}")
+        family = constructors[family]()
+    grid = complex_grid(width, height, bounds)
+    if c is None:
+        B = escape_time(np.zeros_like(grid), grid, max_iter, family)
+    else:
+        B = escape_time(grid, c, max_iter, family)
+    return B.T
+
+
+def generate_newton(coefficients, width=800, height=800, max_iter=50, bounds=JULIA_BOUNDS, tol=1e-6):
+    """
+    生成多项式牛顿迭代的分形(吸引域)
+    :param coefficients: 多项式系数，从最高次项开始，如z^3 - 1为[1, 0, 0, -1]
+    :param width: 图像宽度(像素)
+    :param height: 图像高度(像素)
+    :param max_iter: 最大迭代次数
+    :param bounds: 计算区域(xmin, xmax, ymin, ymax)
+    :param tol: 与某个根的距离小于tol即视为收敛
+    :return: (basins, counts, roots)
+             basins -- 每个点收敛到的根的下标，未收敛为-1
+             counts -- 收敛所需的迭代次数，未收敛为max_iter
+             roots -- 多项式的根(np.roots的顺序)
+             basins和counts的方向与generate_mandelbrot相同
+    """
+    family = IterationFamily.newton(coefficients, tol)
+    grid = complex_grid(width, height, bounds)
+    Z = grid.ravel().copy()
+    B = np.zeros(Z.size, dtype=int)
+    with instrumentation.stage('escape_time'):
+        live = _escape_iterate(Z, 0j, B, np.arange(Z.size), max_iter, family)
+    distance = np.abs(Z[:, np.newaxis] - family.roots[np.newaxis, :])
+    basins = np.argmin(distance, axis=1)
+    basins[live] = -1
+    return basins.reshape(grid.shape).T, B.reshape(grid.shape).T, family.roots
+
+
+def distance_estimate(Z0, C, max_iter, plane='parameter', d=2, bailout=1000.0):
+    """
+    外部距离估计：在逃逸时间迭代中同时携带导数
+    :param Z0: 初始值数组
+    :param C: 参数c，可以是与Z0同形的数组或复数标量
+    :param max_iter: 最大迭代次数
+    :param plane: 'parameter'(对c求导，Mandelbrot型)或'julia'(对z0求导)
+    :param d: 迭代z = z^d + c的次数
+    :param bailout: 逃逸半径，越大估计越准确
+    :return: 与Z0同形的数组，逃逸点为到集合边界的距离估计，未逃逸点为0
 
-    # 初始化记录数组
-    B = np.zeros_like(Z, dtype=int)  # B记录每个点的逃逸时间（迭代次数）
+    估计值为|z| ln|z| / (2|dz|)。d = 2时它是下界(Koebe 1/4定理)：
+    以该点为圆心、以估计值为半径的圆内没有集合中的点。
+    """
+    Z0 = np.asarray(Z0, dtype=np.complex128)
+    state = np.empty((Z0.size, 2), dtype=np.complex128)
+    state[:, 0] = Z0.ravel()
+    state[:, 1] = 0.0 if plane == 'parameter' else 1.0
+    if np.ndim(C) != 0:
+        C = np.broadcast_to(np.asarray(C, dtype=np.complex128), Z0.shape).ravel()
+    B = np.zeros(Z0.size, dtype=int)
+    family = IterationFamily.power_with_derivative(d, bailout, plane)
+    with instrumentation.stage('distance_estimate'):
+        live = _escape_iterate(state, C, B, np.arange(Z0.size), max_iter, family)
+    z, dz = np.abs(state[:, 0]), np.abs(state[:, 1])
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        distance = np.where(z > 1, z * np.log(z) / (2 * dz), 0.0)
+    distance[live] = 0.0
+    return np.nan_to_num(distance, nan=0.0, posinf=0.0).reshape(Z0.shape)
+
+
+def generate_mandelbrot_distance(width=800, height=800, max_iter=100, bounds=MANDELBROT_BOUNDS, bailout=1000.0):
+    """
+    生成Mandelbrot集的外部距离估计
+    :return: 2D numpy数组，方向与generate_mandelbrot相同；集合内(未逃逸)的点为0
+    """
+    C = complex_grid(width, height, bounds)
+    return distance_estimate(np.zeros_like(C), C, max_iter, 'parameter', bailout=bailout).T
+
+
+def generate_julia_distance(c, width=800, height=800, max_iter=100, bounds=JULIA_BOUNDS, bailout=1000.0):
+    """
+    生成Julia集的外部距离估计
+    :return: 2D numpy数组，方向与generate_julia相同；未逃逸的点为0
+    """
+    Z = complex_grid(width, height, bounds)
+    return distance_estimate(Z, c, max_iter, 'julia', bailout=bailout).T
 
-    # 迭代计算逃逸时间
+
+def boundary_mask(distance, bounds, pixels=1.0, include_interior=True):
+    """
+    根据距离估计标出边界附近的点
+    :param distance: generate_mandelbrot_distance/generate_julia_distance的结果
+    :param bounds: 计算distance时使用的区域
+    :param pixels: 阈值，以像素间距为单位
+    :param include_interior: 是否把未逃逸的点(距离为0)也标为True
+    :return: 布尔数组，True表示离边界不超过pixels个像素
+
+    阈值按像素间距换算，任意分辨率下都能画出宽度一致的清晰边界。
+    构建更高分辨率的图块时，掩码为False的区域可以直接按外部处理，
+    include_interior=False时未逃逸区域也可以跳过。
+    """
+    width, height = distance.shape
+    xmin, xmax, ymin, ymax = bounds
+    spacing = max((xmax - xmin) / max(width - 1, 1), (ymax - ymin) / max(height - 1, 1))
+    mask = distance <= pixels * spacing
+    if not include_interior:
+        mask &= distance > 0
+    return mask
+
+
+def _repelling_fixed_point(c):
+    """z^2 + c的排斥不动点(两个不动点中模较大的一个)，它在Julia集上"""
+    return 0.5 + np.sqrt(0.25 - complex(c) + 0j)
+
+
+def julia_iim_points(c, num_points=100_000, walkers=1000, burn_in=20, seed=None):
+    """
+    逆迭代法(IIM)生成Julia集上的点
+    :param c: Julia集参数(复数)
+    :param num_points: 返回的点数
+    :param walkers: 同时迭代的游走者数量
+    :param burn_in: 开始记录前丢弃的迭代次数
+    :param seed: 随机数种子
+    :return: 长度为num_points的复数数组
+
+    每个游走者反复做逆映射z -> ±sqrt(z - c)，符号随机选取。Julia集对逆映射是吸引的，
+    所以丢弃前burn_in步后，游走者的轨迹都落在Julia集上。
+    点在Julia集上的分布不均匀(集中在容易到达的部分)；要均匀覆盖请用generate_julia_iim。
+    """
+    rng = np.random.default_rng(seed)
+    z = _repelling_fixed_point(c) + rng.standard_normal(walkers) + 1j * rng.standard_normal(walkers)
+    steps = burn_in + -(-num_points // walkers)
+    points = np.empty((steps - burn_in, walkers), dtype=np.complex128)
+    for j in range(steps):
+        z = np.sqrt(z - c)
+        z[rng.random(walkers) < 0.5] *= -1
+        if j >= burn_in:
+            points[j - burn_in] = z
+    return points.ravel()[:num_points]
+
+
+def generate_julia_iim(c, width=800, height=800, bounds=JULIA_BOUNDS, max_visits=4, walkers=100_000,
+                       max_steps=10_000, seed=None):
+    """
+    改进的逆迭代法(MIIM)生成Julia集边界的栅格图像
+    :param c: Julia集参数(复数)
+    :param width: 图像宽度(像素)
+    :param height: 图像高度(像素)
+    :param bounds: 图像区域(xmin, xmax, ymin, ymax)，应包含整个Julia集
+    :param max_visits: 每个像素最多被访问的次数
+    :param walkers: 每一步最多保留的点数
+    :param max_steps: 最多的逆迭代步数
+    :param seed: 随机数种子
+    :return: 形状为(width, height)的访问次数数组(方向与generate_julia相同)，非零像素即Julia集
+
+    从排斥不动点出发，每一步把所有当前点的两个原像都作为候选，落在访问次数已达max_visits
+    的像素中的候选被舍弃(同一步内落在同一像素的候选按顺序计数)。已经充分覆盖的区域
+    不再继续展开，采样在整个Julia集上保持均匀；所有像素都达到上限后迭代自然结束。
+    只对连通的Julia集(c在Mandelbrot集内)有效，且只计算边界，不需要逐像素迭代。
+    """
+    rng = np.random.default_rng(seed)
+    xmin, xmax, ymin, ymax = bounds
+    sx = (width - 1) / (xmax - xmin)
+    sy = (height - 1) / (ymax - ymin)
+    visits = np.zeros(width * height, dtype=np.int64)
+    z = np.array([_repelling_fixed_point(c)])
+    for _ in range(max_steps):
+        z = np.sqrt(z - c)
+        z = np.concatenate([z, -z])
+        ix = np.rint((z.real - xmin) * sx)
+        iy = np.rint((z.imag - ymin) * sy)
+        inside = (ix >= 0) & (ix < width) & (iy >= 0) & (iy < height)
+        z = z[inside]
+        index = ix[inside].astype(np.intp) * height + iy[inside].astype(np.intp)
+        # 同一像素内的候选依次编号，已访问次数加编号不超过上限的候选才保留
+        order = np.argsort(index, kind='stable')
+        sorted_index = index[order]
+        first = np.searchsorted(sorted_index, sorted_index, side='left')
+        rank = np.empty_like(order)
+        rank[order] = np.arange(order.size) - first
+        keep = visits[index] + rank < max_visits
+        z, index = z[keep], index[keep]
+        if z.size == 0:
+            break
+        np.add.at(visits, index, 1)  # 只更新本步访问到的像素，代价与点数成正比而不是与像素数成正比
+        if z.size > walkers:
+            z = z[rng.choice(z.size, walkers, replace=False)]
+    if instrumentation.enabled:
+        instrumentation.count('julia_iim.pixels_visited', int(np.count_nonzero(visits)))
+    return visits.reshape(width, height)
+
+
+def _bilinear_fill(coarse, stride, height, width):
+    """
+    把每隔stride个像素采样的粗网格双线性插值到完整分辨率
+    :param coarse: 粗网格数值，形状(ceil(height/stride), ceil(width/stride))
+    :param stride: 采样间隔
+    :param height: 目标高度
+    :param width: 目标宽度
+    :return: 形状(height, width)的浮点数组，采样点处等于原值
+    """
+    def weights(n, m):
+        # 第i个像素位于粗网格节点i//stride和其后一个节点之间，超出最后一个节点时取边界值
+        pos = np.minimum(np.arange(n) / stride, m - 1)
+        i0 = np.floor(pos).astype(int)
+        i1 = np.minimum(i0 + 1, m - 1)
+        return i0, i1, pos - i0
+
+    r0, r1, tr = weights(height, coarse.shape[0])
+    c0, c1, tc = weights(width, coarse.shape[1])
+    rows = coarse[r0] * (1 - tr)[:, np.newaxis] + coarse[r1] * tr[:, np.newaxis]
+    return rows[:, c0] * (1 - tc) + rows[:, c1] * tc
+
+
+def generate_progressive(kind='mandelbrot', c=None, width=800, height=800, max_iter=100, bounds=None,
+                         strides=(8, 4, 2, 1), fill='nearest'):
+    """
+    由粗到细地生成逃逸时间图像
+    :param kind: 'mandelbrot'或'julia'
+    :param c: Julia集参数(kind为'julia'时必需)
+    :param width: 图像宽度(像素)
+    :param height: 图像高度(像素)
+    :param max_iter: 最大迭代次数
+    :param bounds: 计算区域，默认与generate_mandelbrot/generate_julia相同
+    :param strides: 各层的采样间隔，从大到小，后一个必须整除前一个，最后一个应为1
+    :param fill: 未计算像素的填充方式，'nearest'或'bilinear'
+    :return: 生成器，每层产出一张完整分辨率的图像(方向与generate_mandelbrot相同)
+
+    第一层只计算每隔strides[0]个像素的点，代价约为完整图像的1/strides[0]^2；
+    之后每一层只计算新增的采样点，已经算过的点直接复用。
+    """
+    if kind not in ('mandelbrot', 'julia'):
+        raise ValueError(f"Unknown fractal type: {kind}")
+    if kind == 'julia' and c is None:
+        raise ValueError("Julia rendering requires the parameter c.")
+    if fill not in ('nearest', 'bilinear'):
+        raise ValueError(f"Unknown fill mode: {fill}")
+    if any(prev % stride for prev, stride in zip(strides, strides[1:])):
+        raise ValueError("Each stride must divide the previous one.")
+    if bounds is None:
+        bounds = MANDELBROT_BOUNDS if kind == 'mandelbrot' else JULIA_BOUNDS
+
+    grid = complex_grid(width, height, bounds)
+    B = np.zeros(grid.shape, dtype=int)
+    computed = np.zeros(grid.shape, dtype=bool)
+    rows, cols = np.arange(height), np.arange(width)
+
+    for stride in strides:
+        # 本层的采样点中尚未计算的部分
+        todo = np.zeros(grid.shape, dtype=bool)
+        todo[::stride, ::stride] = True
+        todo &= ~computed
+        points = grid[todo]
+        if kind == 'mandelbrot':
+            B[todo] = escape_time(np.zeros_like(points), points, max_iter)
+        else:
+            B[todo] = escape_time(points, c, max_iter)
+        computed |= todo
+
+        if stride == 1:
+            image = B
+        elif fill == 'nearest':
+            image = B[np.ix_(rows // stride * stride, cols // stride * stride)]
+        else:
+            image = _bilinear_fill(B[::stride, ::stride].astype(float), stride, height, width)
+        yield image.T.copy()
+
+
+def generate_antialiased(kind='mandelbrot', c=None, width=800, height=800, max_iter=100, bounds=None,
+                         k=4, threshold=2, family=MANDELBROT_FAMILY):
+    """
+    自适应超采样抗锯齿：只对边界附近的像素做k x k超采样
+    :param kind: 'mandelbrot'或'julia'
+    :param c: Julia集参数(kind为'julia'时必需)
+    :param width: 图像宽度(像素)
+    :param height: 图像高度(像素)
+    :param max_iter: 最大迭代次数
+    :param bounds: 计算区域，默认与generate_mandelbrot/generate_julia相同
+    :param k: 每个方向的子像素数
+    :param threshold: 3x3邻域内逃逸时间的最大差值超过threshold的像素需要细化
+    :param family: 迭代族(IterationFamily)
+    :return: (data, refined_fraction)
+             data -- 浮点数组，方向与generate_mandelbrot相同；细化像素为k*k个子像素逃逸时间的平均值
+             refined_fraction -- 被细化的像素比例，总代价约为(1 + refined_fraction * k^2)倍单次采样
+
+    先按基本分辨率计算一次，再把所有待细化像素的子像素拼成一个数组，一次调用逃逸时间核完成。
+    子像素均匀分布在以像素采样点为中心、边长为一个像素间距的方格内。
+    """
+    if kind not in ('mandelbrot', 'julia'):
+        raise ValueError(f"Unknown fractal type: {kind}")
+    if kind == 'julia' and c is None:
+        raise ValueError("Julia rendering requires the parameter c.")
+    if bounds is None:
+        bounds = MANDELBROT_BOUNDS if kind == 'mandelbrot' else JULIA_BOUNDS
+
+    def evaluate(points):
+        if kind == 'mandelbrot':
+            return escape_time(np.zeros_like(points), points, max_iter, family)
+        return escape_time(points, c, max_iter, family)
+
+    grid = complex_grid(width, height, bounds)
+    B = evaluate(grid)
+
+    # 3x3邻域内的最大值与最小值(边缘复制)
+    padded = np.pad(B, 1, mode='edge')
+    windows = [padded[i:i + height, j:j + width] for i in range(3) for j in range(3)]
+    refine = np.maximum.reduce(windows) - np.minimum.reduce(windows) > threshold
+
+    data = B.astype(float)
+    if refine.any():
+        xmin, xmax, ymin, ymax = bounds
+        dx = (xmax - xmin) / max(width - 1, 1)
+        dy = (ymax - ymin) / max(height - 1, 1)
+        offsets = (np.arange(k) + 0.5) / k - 0.5
+        sub = (offsets[np.newaxis, :] * dx + 1j * offsets[:, np.newaxis] * dy).ravel()
+        points = grid[refine][:, np.newaxis] + sub[np.newaxis, :]
+        data[refine] = evaluate(points).mean(axis=1)
+    fraction = float(refine.mean())
+    if instrumentation.enabled:
+        instrumentation.observe('antialias.refined_fraction', fraction)
+    return data.T, fraction
+
+
+def _reference_orbit(center, max_iter, digits):
+    """
+    用decimal高精度计算Mandelbrot参考轨道
+    :param center: 参考点(re, im)，可以是字符串、Decimal或浮点数
+    :param max_iter: 最大迭代次数
+    :param digits: decimal的有效数字位数
+    :return: 复数数组Z_0, Z_1, ..., 参考点逃逸(|Z| > 2)或达到max_iter时停止
+    """
+    from decimal import Decimal, localcontext
+
+    with localcontext() as ctx:
+        ctx.prec = digits
+        cr, ci = Decimal(str(center[0])), Decimal(str(center[1]))
+        zr, zi = Decimal(0), Decimal(0)
+        orbit = [0j]
+        for _ in range(max_iter):
+            zr, zi = zr * zr - zi * zi + cr, 2 * zr * zi + ci
+            orbit.append(complex(float(zr), float(zi)))
+            if zr * zr + zi * zi > 4:
+                break
+    return np.array(orbit, dtype=np.complex128)
+
+
+def generate_mandelbrot_deep(center, scale, width=800, height=800, max_iter=1000, digits=None):
+    """
+    用微扰理论生成深度放大的Mandelbrot集数据
+    :param center: 视野中心(re, im)，深度放大时应以字符串或Decimal给出以保留全部精度
+    :param scale: 视野宽度的一半(复平面单位)，可以远小于1e-13
+    :param width: 图像宽度(像素)
+    :param height: 图像高度(像素)
+    :param max_iter: 最大迭代次数
+    :param digits: 参考轨道的十进制精度，默认根据scale自动选择
+    :return: 2D numpy数组，包含每个点的逃逸时间，方向与generate_mandelbrot相同
+
+    实现步骤:
+    1. 以视野中心为参考点，用decimal计算一条高精度参考轨道Z_n
+    2. 每个像素只用float64记录相对参考轨道的偏差δ:
+       δ_{n+1} = (2 Z_n + δ_n) δ_n + δc
+    3. 当|Z_m + δ| < |δ|时参考轨道已不能代表该像素(glitch)，
+       或者参考轨道已经用完时，把δ换成完整的z并从参考轨道起点重新开始(rebase)
+
+    δ使用float64，可放大到约1e-300的尺度。
+    """
+    if digits is None:
+        digits = max(30, int(-np.log10(scale)) + 20)
+    Zr = _reference_orbit(center, max_iter, digits)
+    last = len(Zr) - 1
+
+    # 像素相对视野中心的偏移δc，网格方向与complex_grid一致
+    half_height = scale * height / width
+    dC = complex_grid(width, height, (-scale, scale, -half_height, half_height)).ravel()
+
+    B = np.zeros(dC.size, dtype=int)
+    live = np.arange(dC.size)
+    dc = dC
+    delta = np.zeros_like(dC)  # z_0 = Z_0 + δ_0 = 0
+    m = np.zeros(dC.size, dtype=np.intp)  # 每个像素当前使用的参考轨道下标
+    z = delta.copy()
     for j in range(max_iter):
-        mask = np.abs(Z) <= 2  # 创建布尔掩码，标记尚未逃逸的点（|Z| <= 2）
-        Z[mask] = Z[mask] ** 2 + c  # 对未逃逸的点应用迭代公式z = z^2 + c，c固定
-        B += mask  # 未逃逸的点迭代次数加1
+        mask = z.real ** 2 + z.imag ** 2 <= 4.0
+        if not mask.all():
+            B[live[~mask]] = j
+            live, dc, delta, m, z = live[mask], dc[mask], delta[mask], m[mask], z[mask]
+            if live.size == 0:
+                break
+        Zm = Zr[m]
+        delta = (2 * Zm + delta) * delta + dc
+        m += 1
+        z = Zr[m] + delta
+        # glitch检测与rebase
+        rebase = (z.real ** 2 + z.imag ** 2 < delta.real ** 2 + delta.imag ** 2) | (m == last)
+        if rebase.any():
+            delta[rebase] = z[rebase]
+            m[rebase] = 0
+    B[live] = max_iter
 
-    # 返回转置后的结果，使数组方向与图像坐标系匹配
-    return B.T
+    return B.reshape(height, width).T
+
+
+def _julia_batch_unit(c_values, grid, max_iter):
+    """
+    以堆叠方式计算一组c值在同一块网格上的Julia集
+    :param c_values: 一维复数数组，长度为K
+    :param grid: 形状为(h, w)的复数网格(共享的基础网格或其中的若干行)
+    :param max_iter: 最大迭代次数
+    :return: 形状为(K, h, w)的逃逸时间数组
+    """
+    c_values = np.asarray(c_values, dtype=np.complex128)
+    shape = (len(c_values),) + grid.shape
+    Z = np.array(np.broadcast_to(grid, shape)).ravel()
+    B = np.zeros(Z.size, dtype=int)
+    # 第k张图像的c是c_values[k]：按索引现算，不展开成与网格一样大的C数组
+    plane = grid.size
+    with instrumentation.stage('escape_time'):
+        _escape_iterate(Z, lambda index: c_values[index // plane], B, np.arange(Z.size), max_iter)
+    return B.reshape(shape)
+
+
+def generate_julia_batch(c_values, width=800, height=800, max_iter=100, bounds=JULIA_BOUNDS,
+                         grid=None, workers=None, max_memory=256 * 2 ** 20):
+    """
+    批量生成多个c值的Julia集，计算完成一个就产出一个
+    :param c_values: Julia集参数序列(复数)
+    :param width: 图像宽度(像素)
+    :param height: 图像高度(像素)
+    :param max_iter: 最大迭代次数
+    :param bounds: 计算区域(xmin, xmax, ymin, ymax)
+    :param grid: 可选的共享基础网格(形状(height, width)的复数数组)，给定时忽略width/height/bounds
+    :param workers: 进程数，None或1表示在当前进程中计算
+    :param max_memory: 单个工作单元允许使用的内存上限(字节)
+    :return: 生成器，依次产出(index, data)，data与generate_julia(c_values[index])相同
+
+    网格只生成一次。每个工作单元把K个c值堆叠成(K, h, w)一起迭代；
+    若单张图像超过内存上限，则按行切成若干块分别计算后再拼接。
+    使用多进程时，结果按完成顺序产出，而不是按c值的顺序。
+    """
+    c_values = np.asarray(c_values, dtype=np.complex128).ravel()
+    if grid is None:
+        grid = complex_grid(width, height, bounds)
+    height, width = grid.shape
+
+    # 每个点的实测峰值约75字节：Z、z、z*z各16字节，计数、存活索引和逃逸掩码等约27字节，
+    # 留一些余量取80
+    bytes_per_point = 80
+    points = max(1, max_memory // bytes_per_point)
+    if height * width <= points:
+        stack, rows = max(1, points // (height * width)), height
+    else:
+        stack, rows = 1, max(1, points // width)
+
+    units = [(start, row)
+             for start in range(0, len(c_values), stack)
+             for row in range(0, height, rows)]
+    tiles_per_image = -(-height // rows)
+
+    # 收集各行块，某个c值的所有行块都完成后立即产出
+    pending = {}
+
+    def collect(start, row, counts):
+        for k, data in enumerate(counts):
+            index = start + k
+            image = pending.get(index)
+            if image is None:
+                image = pending[index] = [np.empty((height, width), dtype=counts.dtype), 0]
+            image[0][row:row + counts.shape[1]] = data
+            image[1] += 1
+            if image[1] == tiles_per_image:
+                del pending[index]
+                yield index, image[0].T
+
+    if workers is None or workers <= 1:
+        for start, row in units:
+            counts = _julia_batch_unit(c_values[start:start + stack], grid[row:row + rows], max_iter)
+            yield from collect(start, row, counts)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        units = iter(units)
+        running = {}
+        while True:
+            # 同时在途的工作单元数量受限，保证内存有界
+            for start, row in units:
+                future = executor.submit(_julia_batch_unit, c_values[start:start + stack],
+                                         grid[row:row + rows], max_iter)
+                running[future] = (start, row)
+                if len(running) >= 2 * workers:
+                    break
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                start, row = running.pop(future)
+                yield from collect(start, row, future.result())
+
+
+# Buddhabrot的采样区域：|c| > 2的点第一次迭代就逃逸，轨道上没有有界点
+BUDDHABROT_SAMPLE_BOUNDS = (-2.0, 2.0, -2.0, 2.0)
+
+
+def _buddhabrot_cells(grid_size, max_iter, sample_bounds=BUDDHABROT_SAMPLE_BOUNDS):
+    """
+    低分辨率预扫描，找出值得采样的格子
+    :param grid_size: 每个方向的格子数
+    :param max_iter: 最大迭代次数
+    :param sample_bounds: 采样区域(xmin, xmax, ymin, ymax)
+    :return: 候选格子的一维下标(iy * grid_size + ix)
+
+    每个格子检查3x3个点(四角、四边中点和中心)，有任何一点逃逸的格子及其相邻一圈格子为候选；
+    整个格子都在|c| > 2之外的格子剔除。在候选格子中均匀采样只是近似：
+    比检查点间距(格子边长的一半)更细的丝状结构附近，逃逸点所在的格子及其邻居可能都没有
+    检查点逃逸，这些点会被漏掉。grid_size越大，漏掉的逃逸点越少。
+    """
+    xmin, xmax, ymin, ymax = sample_bounds
+    dx = (xmax - xmin) / grid_size
+    dy = (ymax - ymin) / grid_size
+    x = xmin + (np.arange(grid_size) + 0.5) * dx
+    y = ymin + (np.arange(grid_size) + 0.5) * dy
+    # 间距为半个格子的检查点，格子(iy, ix)的检查点是下标[2iy:2iy+3, 2ix:2ix+3]
+    C = complex_grid(2 * grid_size + 1, 2 * grid_size + 1, sample_bounds)
+    point_escapes = escape_time(np.zeros_like(C), C, max_iter) < max_iter
+    escaping = np.zeros((grid_size, grid_size), dtype=bool)
+    for shift_y in range(3):
+        for shift_x in range(3):
+            escaping |= point_escapes[shift_y:shift_y + 2 * grid_size:2, shift_x:shift_x + 2 * grid_size:2]
+    padded = np.pad(escaping, 1)
+    candidate = np.zeros_like(escaping)
+    for shift_y in range(3):
+        for shift_x in range(3):
+            candidate |= padded[shift_y:shift_y + grid_size, shift_x:shift_x + grid_size]
+    # 格子上离原点最近的点
+    near_x = np.clip(0.0, x - dx / 2, x + dx / 2)
+    near_y = np.clip(0.0, y - dy / 2, y + dy / 2)
+    candidate &= near_x[np.newaxis, :] ** 2 + near_y[:, np.newaxis] ** 2 <= 4.0
+    return np.flatnonzero(candidate)
+
+
+def buddhabrot_histogram(c, width, height, max_iter, bounds=MANDELBROT_BOUNDS, min_iter=0):
+    """
+    把一批c值的逃逸轨道累加到直方图中
+    :param c: 一维复数数组
+    :param width: 直方图宽度(像素)
+    :param height: 直方图高度(像素)
+    :param max_iter: 最大迭代次数，达到该次数仍未逃逸的点不计入
+    :param bounds: 直方图覆盖的区域(xmin, xmax, ymin, ymax)
+    :param min_iter: 逃逸时间小于min_iter的点不计入
+    :return: 形状为(width, height)的int64数组(方向与generate_mandelbrot的返回值相同)
+
+    先用逃逸时间核找出逃逸点，再只对这些点重新迭代，每一步把落在区域内的轨道点
+    换算成像素下标暂存，攒够后用np.bincount一次累加。轨道不保存，内存只与批量大小成正比。
+    逃逸时间为n的点贡献z_1..z_{n-1}这n-1个有界轨道点。
+    """
+    c = np.asarray(c, dtype=np.complex128).ravel()
+    counts = escape_time(np.zeros_like(c), c, max_iter)
+    keep = (counts < max_iter) & (counts >= min_iter)
+    c = c[keep]
+    remaining = counts[keep]
+
+    xmin, xmax, ymin, ymax = bounds
+    # 像素中心与complex_grid一致：第i列对应xmin + i * (xmax - xmin) / (width - 1)
+    sx = (width - 1) / (xmax - xmin)
+    sy = (height - 1) / (ymax - ymin)
+    hist = np.zeros(width * height, dtype=np.int64)
+    flush_size = max(c.size, width * height)
+    buffered, buffer_size = [], 0
+    z = np.zeros_like(c)
+    for j in range(1, int(remaining.max()) if c.size else 0):
+        # z_j有界当且仅当逃逸时间大于j
+        alive = remaining > j
+        if not alive.all():
+            z, c, remaining = z[alive], c[alive], remaining[alive]
+        z = z * z + c
+        ix = np.rint((z.real - xmin) * sx)
+        iy = np.rint((z.imag - ymin) * sy)
+        inside = (ix >= 0) & (ix < width) & (iy >= 0) & (iy < height)
+        index = ix[inside].astype(np.intp) * height + iy[inside].astype(np.intp)
+        buffered.append(index)
+        buffer_size += index.size
+        if buffer_size >= flush_size:
+            hist += np.bincount(np.concatenate(buffered), minlength=hist.size)
+            buffered, buffer_size = [], 0
+    if buffered:
+        hist += np.bincount(np.concatenate(buffered), minlength=hist.size)
+    return hist.reshape(width, height)
+
+
+def _buddhabrot_unit(seed, num_samples, cells, grid_size, width, height, max_iter, bounds, min_iter):
+    """在候选格子中均匀采样num_samples个c值并累加轨道直方图(工作进程的一个单元)"""
+    rng = np.random.default_rng(seed)
+    xmin, xmax, ymin, ymax = BUDDHABROT_SAMPLE_BOUNDS
+    pick = cells[rng.integers(len(cells), size=num_samples)]
+    x = xmin + (pick % grid_size + rng.random(num_samples)) * (xmax - xmin) / grid_size
+    y = ymin + (pick // grid_size + rng.random(num_samples)) * (ymax - ymin) / grid_size
+    return buddhabrot_histogram(x + 1j * y, width, height, max_iter, bounds, min_iter)
+
+
+def generate_buddhabrot(width=400, height=400, max_iter=200, num_samples=1_000_000, bounds=MANDELBROT_BOUNDS,
+                        min_iter=0, batch_size=100_000, grid_size=200, workers=None, seed=None):
+    """
+    生成Buddhabrot(逃逸点轨道密度)图像
+    :param width: 图像宽度(像素)
+    :param height: 图像高度(像素)
+    :param max_iter: 最大迭代次数
+    :param num_samples: 采样的c值总数
+    :param bounds: 图像覆盖的区域(xmin, xmax, ymin, ymax)
+    :param min_iter: 逃逸时间小于min_iter的点不计入
+    :param batch_size: 每个工作单元的采样数，决定单个单元的内存占用
+    :param grid_size: 重要性采样预扫描的分辨率
+    :param workers: 进程数，None或1表示在当前进程中计算
+    :param seed: 随机数种子；相同的种子和batch_size给出相同结果，与workers无关
+    :return: 形状为(width, height)的int64轨道计数数组(方向与generate_mandelbrot的返回值相同)
+
+    先在grid_size x grid_size的粗网格上计算逃逸时间，只在可能有逃逸点的格子中采样(近似，
+    比格子更细的丝状结构可能被漏掉，grid_size越大越接近均匀采样，见_buddhabrot_cells)，
+    再分批重新迭代逃逸点并把轨道散布到直方图中(见buddhabrot_histogram)。
+    """
+    cells = _buddhabrot_cells(grid_size, max_iter)
+    sizes = [min(batch_size, num_samples - start) for start in range(0, num_samples, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = (cells, grid_size, width, height, max_iter, bounds, min_iter)
+    hist = np.zeros((width, height), dtype=np.int64)
+
+    if workers is None or workers <= 1:
+        for unit_seed, size in zip(seeds, sizes):
+            hist += _buddhabrot_unit(unit_seed, size, *args)
+        return hist
+
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        units = iter(zip(seeds, sizes))
+        running = set()
+        while True:
+            # 同时在途的工作单元数量受限，保证内存有界
+            for unit_seed, size in units:
+                running.add(executor.submit(_buddhabrot_unit, unit_seed, size, *args))
+                if len(running) >= 2 * workers:
+                    break
+            if not running:
+                break
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                hist += future.result()
+    return hist
+
+
+class TileCache:
+    """
+    逃逸时间图块的磁盘缓存
+
+    以(分形类型, c, 计算区域, 图块尺寸, dtype)的哈希作为文件名，每个图块保存为
+    压缩的.npz文件，内含逃逸时间、已计算的迭代次数以及未逃逸点的Z值。
+    逃逸时间与max_iter无关(只是在max_iter处截断)，因此：
+    - 请求的max_iter不超过已缓存的值时，直接截断缓存结果；
+    - 请求的max_iter更大时，从保存的Z继续迭代，只计算新增的迭代次数。
+    缓存总大小超过上限时，按最近使用时间(LRU)删除最旧的图块。
+    """
+
+    def __init__(self, directory, max_bytes=256 * 2 ** 20):
+        """
+        :param directory: 缓存目录(不存在时自动创建)
+        :param max_bytes: 缓存总大小上限(字节)
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, kind, c, bounds, width, height, dtype):
+        """根据图块参数计算缓存文件路径"""
+        key = json.dumps([
+            kind,
+            None if c is None else [complex(c).real, complex(c).imag],
+            [float(b) for b in bounds],
+            [int(width), int(height)],
+            np.dtype(dtype).name,
+        ])
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest() + '.npz')
+
+    def get(self, kind, bounds, width, height, max_iter, c=None, dtype=np.complex128):
+        """
+        获取一个图块的逃逸时间，必要时计算并写入缓存
+        :param kind: 'mandelbrot'或'julia'
+        :param bounds: 图块的计算区域(xmin, xmax, ymin, ymax)
+        :param width: 图块宽度(像素)
+        :param height: 图块高度(像素)
+        :param max_iter: 最大迭代次数
+        :param c: Julia集参数(kind为'julia'时必需)
+        :param dtype: 迭代使用的复数类型(np.complex64或np.complex128)
+        :return: 2D numpy数组，与generate_mandelbrot/generate_julia的结果方向相同
+        """
+        if kind not in ('mandelbrot', 'julia'):
+            raise ValueError(f"Unknown fractal type: {kind}")
+        if kind == 'julia' and c is None:
+            raise ValueError("Julia tiles require the parameter c.")
+        dtype = np.dtype(dtype)
+        path = self._path(kind, c, bounds, width, height, dtype)
+
+        done = 0
+        if os.path.exists(path):
+            with np.load(path) as cached:
+                done = int(cached['max_iter'])
+                B = cached['counts'].astype(int)
+                live = cached['live']
+                z_live = cached['z_live']
+            if done >= max_iter:
+                os.utime(path)  # 更新最近使用时间
+                return np.minimum(B, max_iter).reshape(height, width).T
+
+        # 重新生成网格，并恢复未逃逸点的状态
+        grid = complex_grid(width, height, bounds).astype(dtype).ravel()
+        if kind == 'mandelbrot':
+            state = EscapeTimeIterator(np.zeros_like(grid), grid, (height, width))
+        else:
+            state = EscapeTimeIterator(grid, dtype.type(c), (height, width))
+        if done:
+            state.Z[live] = z_live
+            state.counts, state.live, state.iterations = B, live, done
+
+        state.advance(max_iter - done)
+        self._store(path, state)
+        return state.image()
+
+    def _store(self, path, state):
+        """原子地写入一个图块的迭代状态，然后按LRU淘汰超出上限的图块"""
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez_compressed(f, max_iter=state.iterations, counts=state.counts.astype(np.int32),
+                                live=state.live, z_live=state.Z[state.live])
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self):
+        """删除最久未使用的图块，直到缓存总大小不超过上限"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npz'):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+
+def colormap_lut(cmap='magma', size=256):
+    """
+    预先计算颜色映射查找表
+    :param cmap: matplotlib颜色映射名称
+    :param size: 查找表条目数(如256或4096)
+    :return: 形状为(size, 3)的uint8数组
+    """
+    import matplotlib
+
+    colors = matplotlib.colormaps[cmap](np.linspace(0.0, 1.0, size))[:, :3]
+    return np.round(colors * 255).astype(np.uint8)
+
+
+def _equalized_levels(data, vmin, vmax, size):
+    """
+    根据逃逸时间直方图计算直方图均衡化后的查找表下标
+    :return: 长度为vmax-vmin+1的数组，第k项是逃逸时间vmin+k对应的查找表下标
+    """
+    hist = np.bincount(np.clip(np.rint(data).astype(int) - vmin, 0, vmax - vmin).ravel(),
+                       minlength=vmax - vmin + 1)
+    cdf = np.cumsum(hist)
+    cdf = (cdf - cdf[0]) / max(cdf[-1] - cdf[0], 1)
+    return np.round(cdf * (size - 1)).astype(np.intp)
+
+
+def colorize(data, lut=None, cmap='magma', vmin=None, vmax=None, levels=None, equalize=False):
+    """
+    把逃逸时间直接映射成RGB图像
+    :param data: 逃逸时间数组(方向与generate_mandelbrot的返回值相同)
+    :param lut: 颜色查找表，默认由colormap_lut(cmap)生成
+    :param cmap: 颜色映射名称(未给出lut时使用)
+    :param vmin: 映射到查找表第一项的值，默认data的最小值
+    :param vmax: 映射到查找表最后一项的值，默认data的最大值
+    :param levels: 预先计算的直方图均衡化下标(见_equalized_levels)，给出时忽略equalize
+    :param equalize: 是否按data自身的直方图做均衡化
+    :return: 形状为(height, width, 3)的uint8数组，y轴向上(第一行是y最大处)
+    """
+    if lut is None:
+        lut = colormap_lut(cmap)
+    vmin = data.min() if vmin is None else vmin
+    vmax = data.max() if vmax is None else vmax
+    # 转置并上下翻转，使数组行对应图像行
+    data = data.T[::-1]
+    if equalize and levels is None:
+        vmin, vmax = int(vmin), int(vmax)
+        levels = _equalized_levels(data, vmin, vmax, len(lut))
+    if levels is not None:
+        index = levels[np.clip(np.rint(data).astype(int) - int(vmin), 0, len(levels) - 1)]
+    else:
+        scale = (len(lut) - 1) / max(vmax - vmin, 1e-12)
+        index = np.clip((data - vmin) * scale, 0, len(lut) - 1).astype(np.intp)
+    return lut[index]
+
+
+def save_png(data, filename, cmap='magma', lut_size=256, equalize=False):
+    """
+    不经过matplotlib图形，直接把逃逸时间保存为PNG
+    :param data: 逃逸时间数组(方向与generate_mandelbrot的返回值相同)
+    :param filename: 输出文件名
+    :param cmap: 颜色映射名称
+    :param lut_size: 颜色查找表条目数
+    :param equalize: 是否做直方图均衡化
+    图像尺寸与计算分辨率完全相同(宽width，高height)，不做任何重采样。
+    """
+    from PIL import Image
+
+    rgb = colorize(data, colormap_lut(cmap, lut_size), equalize=equalize)
+    Image.fromarray(rgb, 'RGB').save(filename)
+
+
+def _png_chunk(tag, payload):
+    """编码一个PNG数据块"""
+    return (struct.pack('>I', len(payload)) + tag + payload
+            + struct.pack('>I', zlib.crc32(tag + payload) & 0xFFFFFFFF))
+
+
+def _png_signature(width, height):
+    """PNG文件签名和IHDR数据块(8位RGB)"""
+    return b'\x89PNG\r\n\x1a\n' + _png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+
+
+def _png_scanlines(block):
+    """把(h, width, 3)的RGB行块转成PNG扫描行：每行前加一个0字节，表示不使用PNG行滤波"""
+    rows, width = block.shape[:2]
+    raw = np.zeros((rows, 1 + width * 3), dtype=np.uint8)
+    raw[:, 1:] = block.reshape(rows, width * 3)
+    return raw.tobytes()
+
+
+def iter_png_chunks(width, height, row_blocks):
+    """
+    逐块编码RGB图像的PNG数据，内存中只需保存当前行块
+    :param width: 图像宽度
+    :param height: 图像高度
+    :param row_blocks: 可迭代对象，从上到下依次给出形状为(h, width, 3)的uint8行块
+    :return: 生成器，依次给出PNG文件的字节片段，拼接后即完整的PNG文件
+    """
+    compressor = zlib.compressobj(6)
+    yield _png_signature(width, height)
+    written = 0
+    for block in row_blocks:
+        payload = compressor.compress(_png_scanlines(block))
+        if payload:
+            yield _png_chunk(b'IDAT', payload)
+        written += block.shape[0]
+    if written != height:
+        raise ValueError(f"Expected {height} rows, got {written}.")
+    yield _png_chunk(b'IDAT', compressor.flush()) + _png_chunk(b'IEND', b'')
+
+
+def png_header(width, height):
+    """
+    独立压缩行块时PNG文件的开头：签名、IHDR和zlib流头
+    之后依次接上各行块的compress_png_rows结果，最后接png_trailer
+    """
+    return _png_signature(width, height) + _png_chunk(b'IDAT', b'\x78\x9c')
+
+
+def compress_png_rows(block):
+    """
+    把一个RGB行块单独压缩成IDAT数据块，各行块可以在不同的进程中压缩，按顺序拼接即可
+    :param block: 形状为(h, width, 3)的uint8行块
+    :return: (IDAT数据块, 原始扫描行的adler32, 原始扫描行的字节数)
+    """
+    raw = _png_scanlines(block)
+    # 不带zlib头的deflate数据，以同步刷新结束(不是最后一个块)，字节对齐后可以直接拼接
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    payload = compressor.compress(raw) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    return _png_chunk(b'IDAT', payload), zlib.adler32(raw), len(raw)
+
+
+def png_trailer(checksums):
+    """
+    独立压缩行块时PNG文件的结尾：结束zlib流，写入整体的adler32和IEND
+    :param checksums: 从上到下各行块compress_png_rows返回的(adler32, 字节数)
+    """
+    adler = 1
+    for block_adler, size in checksums:
+        # 拼接数据的adler32由两段各自的校验和与第二段长度合成(同zlib的adler32_combine)
+        s1 = ((adler & 0xFFFF) + (block_adler & 0xFFFF) - 1) % 65521
+        s2 = ((adler >> 16) + (block_adler >> 16) + size * (adler & 0xFFFF) - size) % 65521
+        adler = (s2 << 16) | s1
+    # b'\x03\x00'是一个空的最终块
+    return _png_chunk(b'IDAT', b'\x03\x00' + struct.pack('>I', adler)) + _png_chunk(b'IEND', b'')
+
+
+def write_png_rows(filename, width, height, row_blocks):
+    """
+    逐块写入RGB图像的PNG文件，内存中只需保存当前行块
+    :param filename: 输出文件名
+    :param width: 图像宽度
+    :param height: 图像高度
+    :param row_blocks: 可迭代对象，从上到下依次给出形状为(h, width, 3)的uint8行块
+    """
+    with open(filename, 'wb') as f:
+        for chunk in iter_png_chunks(width, height, row_blocks):
+            f.write(chunk)
+
+
+def escape_time_rows(kind, width, height, max_iter, bounds, row0, row1, c=None):
+    """
+    只计算整幅图像中第row0到row1-1行(从上往下数，第一行是y最大处)的逃逸时间
+    :param kind: 'mandelbrot'或'julia'
+    :param c: Julia集参数(kind为'julia'时必需)
+    :return: 形状为(width, row1 - row0)的数组，方向与generate_mandelbrot的返回值相同，可直接交给colorize
+    """
+    xmin, xmax, ymin, ymax = bounds
+    x = np.linspace(xmin, xmax, width)
+    y = np.linspace(ymin, ymax, height)[::-1][row0:row1]
+    grid = x[np.newaxis, :] + 1j * y[:, np.newaxis]
+    if kind == 'mandelbrot':
+        B = escape_time(np.zeros_like(grid), grid, max_iter)
+    else:
+        B = escape_time(grid, c, max_iter)
+    # 转回generate_mandelbrot的方向
+    return B[::-1].T
+
+
+def render_png_tiled(filename, kind='mandelbrot', c=None, width=800, height=800, max_iter=100, bounds=None,
+                     cmap='magma', lut_size=256, equalize=False, tile_height=256):
+    """
+    按行块计算逃逸时间并直接写成PNG，适合内存放不下完整图像的超大分辨率
+    :param filename: 输出文件名
+    :param kind: 'mandelbrot'或'julia'
+    :param c: Julia集参数(kind为'julia'时必需)
+    :param width: 图像宽度(像素)
+    :param height: 图像高度(像素)
+    :param max_iter: 最大迭代次数
+    :param bounds: 计算区域，默认与generate_mandelbrot/generate_julia相同
+    :param cmap: 颜色映射名称
+    :param lut_size: 颜色查找表条目数
+    :param equalize: 是否做直方图均衡化(直方图取自1/8分辨率的预览)
+    :param tile_height: 每个行块的高度(像素)
+
+    颜色范围固定为[0, max_iter]，各行块的着色互相一致。
+    """
+    if kind not in ('mandelbrot', 'julia'):
+        raise ValueError(f"Unknown fractal type: {kind}")
+    if kind == 'julia' and c is None:
+        raise ValueError("Julia rendering requires the parameter c.")
+    if bounds is None:
+        bounds = MANDELBROT_BOUNDS if kind == 'mandelbrot' else JULIA_BOUNDS
+    lut = colormap_lut(cmap, lut_size)
+
+    levels = None
+    if equalize:
+        preview = complex_grid(max(width // 8, 2), max(height // 8, 2), bounds)
+        if kind == 'mandelbrot':
+            preview = escape_time(np.zeros_like(preview), preview, max_iter)
+        else:
+            preview = escape_time(preview, c, max_iter)
+        levels = _equalized_levels(preview, 0, max_iter, lut_size)
+
+    def blocks():
+        for row in range(0, height, tile_height):
+            B = escape_time_rows(kind, width, height, max_iter, bounds, row, min(row + tile_height, height), c)
+            yield colorize(B, lut, vmin=0, vmax=max_iter, levels=levels)
+
+    write_png_rows(filename, width, height, blocks())
 
 
 def plot_fractal(data, title, filename=None, cmap='magma'):
@@ -86,6 +1361,8 @@ def plot_fractal(data, title, filename=None, cmap='magma'):
     :param filename: 保存文件名(可选)
     :param cmap: 颜色映射
     """
+    import matplotlib.pyplot as plt  # 首次绘图时才导入
+
     plt.figure(figsize=(10, 10))  # 设置图像大小为10x10英寸
     plt.imshow(data, cmap=cmap, origin='lower')  # 显示数据，origin='lower'确保坐标原点在左下角
     plt.title(title)  # 设置图像标题
@@ -112,6 +1389,7 @@ if __name__ == "__main__":
         0.285 + 0.01j  # 复杂结构Julia集，细节丰富
     ]
 
-    for i, c in enumerate(julia_c_values):
-        julia = generate_julia(c, width, height, max_iter)
+    # 所有c值共享同一个网格，批量计算
+    for i, julia in generate_julia_batch(julia_c_values, width, height, max_iter):
+        c = julia_c_values[i]
         plot_fractal(julia, f"Julia Set (c = {c:.3f})", f"julia_{i + 1}.png")
@@ -1,14 +1,27 @@
 import unittest
 import os
 import sys
+import tempfile
+import tracemalloc
 import numpy as np
 from pathlib import Path
 
 # 添加父目录到Python路径
 sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent.parent))  # 仪表模块instrumentation
 
 # 尝试导入学生代码，失败时导入参考解决方案
 from mandelbrot_julia import generate_mandelbrot, generate_julia
+from mandelbrot_julia import generate_julia_batch, generate_mandelbrot_deep, TileCache
+from mandelbrot_julia import EscapeTimeIterator, generate_progressive
+from mandelbrot_julia import colorize, save_png, render_png_tiled
+from mandelbrot_julia import buddhabrot_histogram, generate_buddhabrot
+from mandelbrot_julia import _buddhabrot_cells, BUDDHABROT_SAMPLE_BOUNDS
+from mandelbrot_julia import IterationFamily, generate_escape_fractal, generate_newton
+from mandelbrot_julia import generate_mandelbrot_distance, generate_julia_distance, boundary_mask
+from mandelbrot_julia import generate_antialiased, escape_time
+from mandelbrot_julia import julia_iim_points, generate_julia_iim, distance_estimate, JULIA_BOUNDS
+import instrumentation
 #from solution.mandelbrot_julia_solution import generate_mandelbrot, generate_julia
 
 class TestFractals(unittest.TestCase):
@@ -52,5 +65,254 @@ class TestFractals(unittest.TestCase):
         # 至少有一个点应该快速逃逸
         self.assertTrue(np.any(result < 10))
 
+    def test_julia_batch_matches_single(self):
+        """测试批量Julia集与逐个计算结果一致"""
+        c_values = [-0.8 + 0.156j, -0.4 + 0.6j, 0.285 + 0.01j]
+        expected = [generate_julia(c, width=60, height=40, max_iter=40) for c in c_values]
+        # 较小的内存上限会迫使单张图像按行切块计算
+        for max_memory in (256 * 2 ** 20, 80 * 60 * 10):
+            results = dict(generate_julia_batch(c_values, width=60, height=40, max_iter=40,
+                                                max_memory=max_memory))
+            self.assertEqual(sorted(results), [0, 1, 2])
+            for i, data in results.items():
+                np.testing.assert_array_equal(data, expected[i])
+
+    def test_julia_batch_memory(self):
+        """测试批量Julia集的内存峰值不超过max_memory(另加网格和单批结果)"""
+        c_values = np.linspace(-0.8, 0.3, 20) + 0.156j
+        max_memory = 16 * 2 ** 20
+        tracemalloc.start()
+        try:
+            for _ in generate_julia_batch(c_values, width=400, height=400, max_iter=100, max_memory=max_memory):
+                pass
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, max_memory * 1.25)
+
+    def test_mandelbrot_deep_matches_direct(self):
+        """测试微扰模式在普通放大倍数下与直接迭代一致"""
+        scale = 1e-5
+        bounds = (-scale, scale, 1 - 0.75 * scale, 1 + 0.75 * scale)
+        direct = generate_mandelbrot(width=80, height=60, max_iter=500, bounds=bounds)
+        deep = generate_mandelbrot_deep(("0", "1"), scale, width=80, height=60, max_iter=500)
+        self.assertEqual(deep.shape, (80, 60))
+        self.assertGreater(np.mean(deep == direct), 0.99)
+
+    def test_mandelbrot_deep_beyond_float_precision(self):
+        """测试放大到complex128精度以外时仍能分辨细节"""
+        scale = 1e-30
+        bounds = (-scale, scale, 1 - 0.75 * scale, 1 + 0.75 * scale)
+        direct = generate_mandelbrot(width=80, height=60, max_iter=500, bounds=bounds)
+        deep = generate_mandelbrot_deep(("0", "1"), scale, width=80, height=60, max_iter=500)
+        self.assertEqual(len(np.unique(direct)), 1)  # 直接迭代已无法区分像素
+        self.assertGreater(len(np.unique(deep)), 10)
+
+    def test_tile_cache_resume(self):
+        """测试图块缓存的命中、截断和继续迭代"""
+        bounds = (-2.0, 1.0, -1.5, 1.5)
+        with tempfile.TemporaryDirectory() as directory:
+            cache = TileCache(directory)
+            first = cache.get('mandelbrot', bounds, 64, 48, 30)
+            np.testing.assert_array_equal(first, generate_mandelbrot(64, 48, 30, bounds=bounds))
+            # 提高max_iter时从保存的状态继续迭代
+            resumed = cache.get('mandelbrot', bounds, 64, 48, 100)
+            np.testing.assert_array_equal(resumed, generate_mandelbrot(64, 48, 100, bounds=bounds))
+            # 较小的max_iter直接由缓存结果截断得到
+            np.testing.assert_array_equal(cache.get('mandelbrot', bounds, 64, 48, 30), first)
+            julia = cache.get('julia', (-2, 2, -2, 2), 40, 40, 50, c=-0.4 + 0.6j)
+            np.testing.assert_array_equal(julia, generate_julia(-0.4 + 0.6j, 40, 40, 50))
+            self.assertEqual(len(os.listdir(directory)), 2)
+
+    def test_tile_cache_eviction(self):
+        """测试缓存超过上限时淘汰旧图块"""
+        with tempfile.TemporaryDirectory() as directory:
+            cache = TileCache(directory, max_bytes=1)
+            cache.get('julia', (-2, 2, -2, 2), 20, 20, 20, c=0.285 + 0.01j)
+            self.assertEqual(os.listdir(directory), [])
+
+    def test_escape_time_iterator(self):
+        """测试分步迭代的中间结果与一次性计算一致"""
+        state = EscapeTimeIterator.mandelbrot(width=50, height=40)
+        images = list(state.refine(90, step=30))
+        self.assertEqual(len(images), 3)
+        for i, image in enumerate(images):
+            np.testing.assert_array_equal(image, generate_mandelbrot(50, 40, 30 * (i + 1)))
+        julia = EscapeTimeIterator.julia(-0.8 + 0.156j, width=30, height=30)
+        self.assertEqual(julia.advance(40), 40)
+        np.testing.assert_array_equal(julia.image(), generate_julia(-0.8 + 0.156j, 30, 30, 40))
+
+    def test_progressive_levels(self):
+        """测试由粗到细的渲染：采样点精确，最后一层与完整计算一致"""
+        expected = generate_mandelbrot(width=50, height=37, max_iter=40)
+        for fill in ('nearest', 'bilinear'):
+            images = list(generate_progressive('mandelbrot', width=50, height=37, max_iter=40, fill=fill))
+            self.assertEqual(len(images), 4)
+            for stride, image in zip((8, 4, 2, 1), images):
+                self.assertEqual(image.shape, (50, 37))
+                np.testing.assert_array_equal(image[::stride, ::stride], expected[::stride, ::stride])
+            np.testing.assert_array_equal(images[-1], expected)
+        julia = list(generate_progressive('julia', c=-0.4 + 0.6j, width=30, height=30, max_iter=30))
+        np.testing.assert_array_equal(julia[-1], generate_julia(-0.4 + 0.6j, 30, 30, 30))
+
+    def test_png_export(self):
+        """测试PNG导出的分辨率，以及分块导出与整体导出一致"""
+        from PIL import Image
+        data = generate_mandelbrot(width=70, height=50, max_iter=30)
+        rgb = colorize(data, vmin=0, vmax=30)
+        self.assertEqual(rgb.shape, (50, 70, 3))
+        self.assertEqual(rgb.dtype, np.uint8)
+        with tempfile.TemporaryDirectory() as directory:
+            whole = os.path.join(directory, 'whole.png')
+            tiled = os.path.join(directory, 'tiled.png')
+            save_png(data, whole, equalize=True)
+            render_png_tiled(tiled, width=70, height=50, max_iter=30, tile_height=16)
+            with Image.open(whole) as image:
+                self.assertEqual(image.size, (70, 50))
+            with Image.open(tiled) as image:
+                self.assertEqual(image.size, (70, 50))
+                np.testing.assert_array_equal(np.asarray(image.convert('RGB')), rgb)
+
+    def test_buddhabrot(self):
+        """批量轨道直方图与逐点迭代一致；多进程与单进程结果相同，图像关于实轴对称"""
+        rng = np.random.default_rng(3)
+        c = rng.uniform(-2, 1, 300) + 1j * rng.uniform(-1.5, 1.5, 300)
+        width, height, max_iter = 30, 20, 60
+        expected = np.zeros((width, height), dtype=np.int64)
+        for c0 in c:
+            z, orbit = 0j, []
+            for _ in range(max_iter):
+                z = z * z + c0
+                if abs(z) > 2:
+                    break
+                orbit.append(z)
+            else:
+                continue  # 未逃逸的点不计入
+            for z in orbit:
+                ix = round((z.real + 2.0) * (width - 1) / 3.0)
+                iy = round((z.imag + 1.5) * (height - 1) / 3.0)
+                if 0 <= ix < width and 0 <= iy < height:
+                    expected[ix, iy] += 1
+        np.testing.assert_array_equal(buddhabrot_histogram(c, width, height, max_iter), expected)
+
+        serial = generate_buddhabrot(40, 40, 50, num_samples=20000, batch_size=5000, seed=7)
+        parallel = generate_buddhabrot(40, 40, 50, num_samples=20000, batch_size=5000, seed=7, workers=2)
+        np.testing.assert_array_equal(serial, parallel)
+        self.assertGreater(serial.sum(), 0)
+        self.assertGreater(np.corrcoef(serial.ravel(), serial[:, ::-1].ravel())[0, 1], 0.5)
+
+    def test_buddhabrot_cells(self):
+        """预扫描在每个格子检查多个点，均匀采样中贡献轨道的逃逸点都落在候选格子里"""
+        grid_size, max_iter = 80, 50
+        xmin, xmax, ymin, ymax = BUDDHABROT_SAMPLE_BOUNDS
+        rng = np.random.default_rng(0)
+        c = rng.uniform(xmin, xmax, 200000) + 1j * rng.uniform(ymin, ymax, 200000)
+        n = escape_time(np.zeros_like(c), c, max_iter)
+        ix = np.minimum(((c.real - xmin) / (xmax - xmin) * grid_size).astype(int), grid_size - 1)
+        iy = np.minimum(((c.imag - ymin) / (ymax - ymin) * grid_size).astype(int), grid_size - 1)
+        contributing = (n >= 2) & (n < max_iter)
+        cells = _buddhabrot_cells(grid_size, max_iter)
+        self.assertTrue(np.isin(iy * grid_size + ix, cells)[contributing].all())
+        self.assertLess(len(cells), grid_size ** 2)
+
+    def test_iteration_families(self):
+        """各迭代族与逐点计算的参考实现一致，默认迭代族与generate_mandelbrot相同"""
+        np.testing.assert_array_equal(generate_escape_fractal('mandelbrot', 60, 50, 40),
+                                      generate_mandelbrot(60, 50, 40))
+        steps = {
+            'multibrot3': (IterationFamily.power(3), lambda z, c: z ** 3 + c),
+            'burning_ship': ('burning_ship', lambda z, c: complex(abs(z.real), abs(z.imag)) ** 2 + c),
+            'tricorn': ('tricorn', lambda z, c: z.conjugate() ** 2 + c),
+        }
+        bounds = (-2.0, 2.0, -2.0, 2.0)
+        x, y = np.linspace(-2, 2, 24), np.linspace(-2, 2, 20)
+        for name, (family, step) in steps.items():
+            data = generate_escape_fractal(family, 24, 20, 30, bounds)
+            expected = np.zeros((24, 20), dtype=int)
+            for i in range(24):
+                for j in range(20):
+                    c, z, n = complex(x[i], y[j]), 0j, 0
+                    while n < 30 and abs(z) <= 2:
+                        z = step(z, c)
+                        n += 1
+                    expected[i, j] = n
+            np.testing.assert_array_equal(data, expected, err_msg=name)
+        with self.assertRaises(ValueError):
+            IterationFamily.power(1)
+
+    def test_newton(self):
+        """z^3 - 1的牛顿迭代：实轴正半轴收敛到根1，三个吸引域大小相近"""
+        basins, counts, roots = generate_newton([1, 0, 0, -1], 61, 61, max_iter=50)
+        self.assertEqual(basins.shape, (61, 61))
+        self.assertAlmostEqual(roots[basins[45, 30]], 1.0)
+        self.assertEqual(counts[45, 30], counts[45:, 30].min())
+        sizes = np.bincount(basins[basins >= 0].ravel(), minlength=3)
+        self.assertLess(sizes.max() / sizes.min(), 1.2)
+        self.assertGreater(np.mean(basins >= 0), 0.95)
+
+    def test_distance_estimate(self):
+        """距离估计是到集合的距离下界；边界掩码包含集合内的点，阈值越大包含的外部点越多"""
+        bounds = (-2.0, 1.0, -1.5, 1.5)
+        width = height = 120
+        distance = generate_mandelbrot_distance(width, height, 300, bounds)
+        inside = generate_mandelbrot(width, height, 300, bounds) == 300
+        np.testing.assert_array_equal(distance == 0, inside)
+        x = np.linspace(bounds[0], bounds[1], width)[:, np.newaxis]
+        y = np.linspace(bounds[2], bounds[3], height)[np.newaxis, :]
+        points = (x + 1j * y)
+        members = points[inside]
+        for i, j in np.argwhere(~inside)[::97]:
+            self.assertLessEqual(distance[i, j], np.abs(members - points[i, j]).min())
+        thin = boundary_mask(distance, bounds, pixels=1.0)
+        wide = boundary_mask(distance, bounds, pixels=4.0)
+        self.assertTrue(thin[inside].all())
+        self.assertTrue((wide >= thin).all() and wide.sum() > thin.sum())
+        self.assertFalse(boundary_mask(distance, bounds, include_interior=False)[inside].any())
+        self.assertGreater(generate_julia_distance(-0.8 + 0.156j, 50, 50, 100).max(), 0)
+
+    def test_antialiased(self):
+        """只细化边界像素：其余像素与单次采样相同，细化像素是k x k子像素的平均值"""
+        base = generate_mandelbrot(80, 60, 50)
+        data, fraction = generate_antialiased(width=80, height=60, max_iter=50, k=3)
+        self.assertTrue(0 < fraction < 0.5)
+        refined = data != base
+        self.assertLessEqual(refined.mean(), fraction)
+        i, j = np.argwhere(refined)[0]
+        x = np.linspace(-2.0, 1.0, 80)[i] + np.array([-1, 0, 1]) / 3 * 3.0 / 79
+        y = np.linspace(-1.5, 1.5, 60)[j] + np.array([-1, 0, 1]) / 3 * 3.0 / 59
+        sub = x[np.newaxis, :] + 1j * y[:, np.newaxis]
+        self.assertAlmostEqual(data[i, j], escape_time(np.zeros_like(sub), sub, 50).mean())
+        unrefined, none = generate_antialiased('julia', -0.8 + 0.156j, 40, 40, 30, threshold=30)
+        self.assertEqual(none, 0.0)
+        np.testing.assert_array_equal(unrefined, generate_julia(-0.8 + 0.156j, 40, 40, 30))
+
+    def test_julia_iim(self):
+        """逆迭代得到的点落在Julia集上；MIIM栅格的每个像素访问次数不超过上限且都在边界附近"""
+        c = -0.123 + 0.745j
+        points = julia_iim_points(c, num_points=5000, walkers=500, seed=1)
+        self.assertEqual(points.shape, (5000,))
+        self.assertLess(distance_estimate(points, c, 300, 'julia').max(), 1e-2)
+
+        visits = generate_julia_iim(c, 200, 200, max_visits=3, seed=1)
+        self.assertEqual(visits.shape, (200, 200))
+        self.assertLessEqual(visits.max(), 3)
+        self.assertGreater(np.count_nonzero(visits), 500)
+        near = boundary_mask(generate_julia_distance(c, 200, 200, 500), JULIA_BOUNDS, pixels=2.0)
+        self.assertTrue(near[visits > 0].all())
+
+    def test_instrumentation(self):
+        """执行与跳过的迭代次数之和等于像素数乘以最大迭代次数，关闭后不再记录"""
+        with instrumentation.Collector() as stats:
+            mandelbrot = generate_mandelbrot(40, 30, 50)
+        executed = stats.counters['escape_time.iterations_executed']
+        skipped = stats.counters['escape_time.iterations_skipped']
+        self.assertEqual(executed + skipped, 40 * 30 * 50)
+        self.assertGreater(skipped, 0)
+        self.assertEqual(stats.timings['escape_time']['calls'], 1)
+        self.assertIn('iterations_executed', stats.to_json())
+        np.testing.assert_array_equal(mandelbrot, generate_mandelbrot(40, 30, 50))
+        self.assertEqual(stats.counters['escape_time.iterations_executed'], executed)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,53 @@
+"""
+盒计数基准测试：比较向量化的box_count与逐个盒子遍历的实现
+
+用法：
+python benchmark_box_counting.py [图像边长] [前景像素比例]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from box_counting import box_count, _box_count_loop
+
+
+def benchmark(size=2000, density=0.01, box_sizes=(1, 2, 4, 8, 16, 32, 64), seed=0):
+    """
+    在随机二值图像上分别运行两种实现并核对结果
+    
+    参数：
+    size -- 图像边长（像素）
+    density -- 前景像素比例
+    box_sizes -- 盒子尺寸列表
+    seed -- 随机数种子
+    
+    返回：
+    列表，每项为(box_size, 循环版耗时, 向量化版耗时)
+    """
+    rng = np.random.default_rng(seed)
+    image = (rng.random((size, size)) < density).astype(int)
+    results = []
+    for box_size in box_sizes:
+        start = time.perf_counter()
+        expected = _box_count_loop(image, [box_size])
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        counts = box_count(image, [box_size])
+        vector_time = time.perf_counter() - start
+
+        if counts != expected:
+            raise AssertionError(f"box_size={box_size}: {counts} != {expected}")
+        results.append((box_size, loop_time, vector_time))
+    return results
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    density = float(sys.argv[2]) if len(sys.argv) > 2 else 0.01
+    print(f"图像 {size}x{size}，前景比例 {density}")
+    print(f"{'box_size':>8} {'循环(s)':>10} {'向量化(s)':>10} {'加速比':>8}")
+    for box_size, loop_time, vector_time in benchmark(size, density):
+        print(f"{box_size:>8} {loop_time:>10.4f} {vector_time:>10.4f} {loop_time / vector_time:>8.1f}")
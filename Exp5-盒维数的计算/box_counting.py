@@ -8,20 +8,23 @@
 3. 在main函数中测试你的实现
 """
 
+import time
+
 import numpy as np
-from PIL import Image
-import matplotlib.pyplot as plt
 
-def load_and_binarize_image(image_path, threshold=128):
+import instrumentation
+
+def load_and_binarize_image(image_path, threshold=128, packed=False):
     """
     加载图像并转换为二值数组
     
     参数：
     image_path -- 图像文件路径（字符串）
     threshold -- 二值化阈值（0-255之间的整数，默认128）
+    packed -- 为True时返回按行打包成比特的PackedBinaryImage，每像素只占1比特
     
     返回：
-    二值化的NumPy数组（0和1组成）
+    二值化的NumPy数组（0和1组成），或PackedBinaryImage
     
     实现步骤：
     1. 使用PIL.Image打开图像并转换为灰度
@@ -30,17 +33,141 @@ def load_and_binarize_image(image_path, threshold=128):
     """
     # TODO: 实现图像加载和二值化
     # ... your code here ...
+    from PIL import Image  # 首次读取图像时才导入
+
     image = Image.open(image_path).convert('L')
+    if packed:
+        return PackedBinaryImage.from_image(image, threshold)
     image_array = np.array(image)
     binary_image = (image_array > threshold).astype(int)
     return binary_image
 
+class PackedBinaryImage:
+    """
+    按行打包成比特的二值图像（np.packbits，高位在前）
+    
+    属性：
+    bits -- 形状为(height, ceil(width / 8))的uint8数组
+    shape -- 原始图像形状(height, width)
+    """
+
+    def __init__(self, bits, shape):
+        self.bits = bits
+        self.shape = tuple(shape)
+
+    @classmethod
+    def _pack_bands(cls, read_band, shape, band_rows, threshold):
+        """逐带读取并打包，read_band(row0, row1)返回这些行的数组"""
+        height, width = shape
+        bits = np.empty((height, (width + 7) // 8), dtype=np.uint8)
+        for row in range(0, height, band_rows):
+            band = read_band(row, min(row + band_rows, height))
+            mask = band != 0 if threshold is None else band > threshold
+            bits[row:row + band_rows] = np.packbits(mask, axis=1)
+        return cls(bits, shape)
+
+    @classmethod
+    def from_array(cls, binary_image, band_rows=1024, threshold=None):
+        """
+        从数组打包
+        
+        参数：
+        binary_image -- 二值图像数组，或给定threshold时的灰度数组（如uint8）
+        band_rows -- 每次打包的行数，避免一次生成整幅布尔图像
+        threshold -- 给定时按“像素值 > threshold”逐带二值化，否则按非零二值化
+        """
+        return cls._pack_bands(lambda row0, row1: binary_image[row0:row1], binary_image.shape,
+                               band_rows, threshold)
+
+    @classmethod
+    def from_image(cls, image, threshold=128, band_rows=256):
+        """
+        从灰度PIL图像逐带二值化并打包，不生成整幅图像大小的NumPy数组
+        （PIL自身仍保存解码后的图像，每像素1字节；更大的扫描见box_count_banded）
+        
+        参数：
+        image -- 'L'模式的PIL图像
+        threshold -- 二值化阈值
+        band_rows -- 每次读取的行数
+        """
+        width, height = image.size
+        return cls._pack_bands(lambda row0, row1: np.asarray(image.crop((0, row0, width, row1))),
+                               (height, width), band_rows, threshold)
+
+    def unpack(self, rows=slice(None)):
+        """解包指定的行，返回0和1组成的uint8数组"""
+        return np.unpackbits(self.bits[rows], axis=1, count=self.shape[1])
+
+# 每个字节中1的个数
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+# 盒子尺寸为1、2、4时，把每组像素的“或”结果收集到组内最高位后保留这些位的掩码
+_GROUP_MASKS = {1: 0xFF, 2: 0xAA, 4: 0x88}
+
+def _box_count_packed(packed, box_sizes):
+    """
+    直接在打包的比特上做盒计数
+    
+    参数：
+    packed -- PackedBinaryImage
+    box_sizes -- 盒子尺寸列表
+    
+    返回：
+    字典 {box_size: count}，与对解包图像调用box_count的结果相同
+    
+    实现步骤：
+    1. 盒子尺寸是8的倍数时，每个盒子在每行上正好覆盖整数个字节，
+       直接对字节（能整除时合并成2、4、8字节的整字）做“或”判断是否非空
+    2. 盒子尺寸为1、2、4时，先把盒子内的行按位或，再在字节内部用移位合并每组像素，
+       最后查表统计置位个数
+    3. 其他尺寸按行分带解包后用reshape计数，内存只与带宽有关
+    """
+    height, width = packed.shape
+    counts = {}
+    for box_size in dict.fromkeys(box_sizes):
+        num_rows = height // box_size
+        num_cols = width // box_size
+        used_bits = num_cols * box_size
+        block = packed.bits[:num_rows * box_size, :(used_bits + 7) // 8]
+        if num_rows == 0 or num_cols == 0:
+            counts[box_size] = 0
+        elif box_size % 8 == 0:
+            words = box_size // 8
+            for dtype in (np.uint64, np.uint32, np.uint16):
+                itemsize = np.dtype(dtype).itemsize
+                if words % itemsize == 0:
+                    # 把连续的字节合并成整字一起判断
+                    block = block.view(dtype)
+                    words //= itemsize
+                    break
+            boxes = block.reshape(num_rows, box_size, num_cols, words).any(axis=(1, 3))
+            counts[box_size] = int(np.count_nonzero(boxes))
+        elif box_size in _GROUP_MASKS:
+            merged = np.bitwise_or.reduce(block.reshape(num_rows, box_size, block.shape[1]), axis=1)
+            if used_bits % 8:
+                # 去掉被丢弃的余数列
+                merged[:, -1] &= (0xFF << (8 - used_bits % 8)) & 0xFF
+            folded = merged.copy()
+            for shift in range(1, box_size):
+                folded |= merged << shift
+            counts[box_size] = int(_POPCOUNT[folded & _GROUP_MASKS[box_size]].sum(dtype=np.int64))
+        else:
+            band = max(1, (1 << 22) // (box_size * width))  # 每带包含的盒子行数
+            count = 0
+            for row in range(0, num_rows, band):
+                rows = min(band, num_rows - row)
+                pixels = np.unpackbits(block[row * box_size:(row + rows) * box_size], axis=1, count=used_bits)
+                boxes = pixels.reshape(rows, box_size, num_cols, box_size).any(axis=(1, 3))
+                count += int(np.count_nonzero(boxes))
+            counts[box_size] = count
+    return counts
+
 def box_count(binary_image, box_sizes):
     """
     盒计数算法实现
     
     参数：
-    binary_image -- 二值图像数组（0和1组成的NumPy数组）
+    binary_image -- 二值图像数组（0和1组成的NumPy数组），或PackedBinaryImage
     box_sizes -- 盒子尺寸列表（整数列表）
     
     返回：
@@ -49,15 +176,253 @@ def box_count(binary_image, box_sizes):
     实现步骤：
     1. 获取图像高度和宽度
     2. 遍历每个盒子尺寸：
-       a. 计算网格行列数
-       b. 遍历所有盒子区域
-       c. 统计包含前景像素的盒子数量
+       a. 计算网格行列数，把图像裁剪到盒子尺寸的整数倍（与逐个盒子遍历时丢弃的余数相同）
+       b. 重排为(行数, s, 列数, s)，在盒子内部的两个轴上做any，一次得到所有盒子是否非空
+       c. 统计非空盒子数量
     """
-    # TODO: 实现盒计数算法
-    # ... your code here ...
+    if isinstance(binary_image, PackedBinaryImage):
+        return _box_count_packed(binary_image, box_sizes)
     height, width = binary_image.shape
     counts = {}
-    for box_size in box_sizes:
+    for box_size in dict.fromkeys(box_sizes):
+        num_rows = height // box_size
+        num_cols = width // box_size
+        cropped = binary_image[:num_rows * box_size, :num_cols * box_size]
+        boxes = cropped.reshape(num_rows, box_size, num_cols, box_size).any(axis=(1, 3))
+        counts[box_size] = int(np.count_nonzero(boxes))
+        if instrumentation.enabled:
+            instrumentation.count(f'box_count.boxes_scanned[{box_size}]', num_rows * num_cols)
+    return counts
+
+def box_count_pyramid(binary_image, box_sizes):
+    """
+    用占据金字塔一次性计算所有2的幂次盒子尺寸的计数
+    
+    参数：
+    binary_image -- 二值图像数组
+    box_sizes -- 盒子尺寸列表（必须都是2的幂次）
+    
+    返回：
+    字典 {box_size: count}，与box_count的结果相同
+    
+    实现步骤：
+    1. 第0层是图像本身是否非零
+    2. 第k层由第k-1层做2x2的“或”池化得到，奇数行列直接丢弃，
+       因此第k层的每个元素恰好对应box_count中尺寸为2^k的一个盒子
+    3. 每层的非零元素个数就是该尺寸的盒子计数
+    除第一次池化外，其余各层的总工作量只有一遍全图的约1/3
+    """
+    levels = {}
+    for box_size in dict.fromkeys(box_sizes):
+        level = int(box_size).bit_length() - 1
+        if box_size < 1 or 1 << level != box_size:
+            raise ValueError(f"Box size {box_size} is not a power of two.")
+        levels[box_size] = level
+
+    counts = {}
+    occupied = np.asarray(binary_image) != 0
+    max_level = max(levels.values(), default=0)
+    for level in range(max_level + 1):
+        if level > 0:
+            rows, cols = occupied.shape[0] // 2, occupied.shape[1] // 2
+            occupied = occupied[:rows * 2, :cols * 2].reshape(rows, 2, cols, 2).any(axis=(1, 3))
+        for box_size, box_level in levels.items():
+            if box_level == level:
+                counts[box_size] = int(np.count_nonzero(occupied))
+    return {box_size: counts[box_size] for box_size in box_sizes}
+
+def summed_area_table(binary_image):
+    """
+    计算二值图像的积分图（summed-area table）
+    
+    参数：
+    binary_image -- 二值图像数组
+    
+    返回：
+    形状为(height+1, width+1)的数组S，S[i, j]是图像[:i, :j]中前景像素的个数
+    """
+    height, width = binary_image.shape
+    dtype = np.int32 if height * width < 2 ** 31 else np.int64
+    table = np.zeros((height + 1, width + 1), dtype=dtype)
+    np.cumsum(np.asarray(binary_image) != 0, axis=0, dtype=dtype, out=table[1:, 1:])
+    np.cumsum(table[1:, 1:], axis=1, out=table[1:, 1:])
+    return table
+
+def box_count_sat(binary_image, box_sizes, table=None):
+    """
+    用积分图计算任意盒子尺寸的计数，每个盒子只需O(1)次查表
+    
+    参数：
+    binary_image -- 二值图像数组
+    box_sizes -- 盒子尺寸列表
+    table -- 预先计算的积分图（可选）
+    
+    返回：
+    字典 {box_size: count}，与box_count的结果相同
+    """
+    if table is None:
+        table = summed_area_table(binary_image)
+    height, width = table.shape[0] - 1, table.shape[1] - 1
+    counts = {}
+    for box_size in dict.fromkeys(box_sizes):
+        num_rows = height // box_size
+        num_cols = width // box_size
+        # 盒子四个角在积分图中的取值
+        corners = table[:num_rows * box_size + 1:box_size, :num_cols * box_size + 1:box_size]
+        sums = corners[1:, 1:] - corners[:-1, 1:] - corners[1:, :-1] + corners[:-1, :-1]
+        counts[box_size] = int(np.count_nonzero(sums))
+    return counts
+
+def box_count_min_offset(binary_image, box_sizes, offsets=None, seed=None, table=None):
+    """
+    在多个网格偏移下做盒计数，返回每个尺寸的最小计数
+    
+    参数：
+    binary_image -- 二值图像数组
+    box_sizes -- 盒子尺寸列表
+    offsets -- None表示尝试全部s*s个偏移；整数k表示每个尺寸随机抽取k个偏移（总包含(0, 0)）
+    seed -- 随机抽样的种子
+    table -- 预先计算的积分图（可选）
+    
+    返回：
+    字典 {box_size: count}，count为所有尝试过的偏移中非空盒子数的最小值
+    
+    实现步骤：
+    1. 所有尺寸和偏移共用一张积分图
+    2. 偏移(dy, dx)的网格线位于dy + k*s和dx + k*s处，截断到图像范围内，
+       因此边缘的不完整盒子也参与计数，不再丢弃余数；截断后重合的网格线构成的空盒子不影响计数
+    3. 对每个dy，一次取出所有dx对应的角点，向量化地算出这些网格的计数
+    每个尺寸的工作量约为一遍全图
+    """
+    if table is None:
+        table = summed_area_table(binary_image)
+    height, width = table.shape[0] - 1, table.shape[1] - 1
+    rng = np.random.default_rng(seed)
+    counts = {}
+    for box_size in dict.fromkeys(box_sizes):
+        box_size_int = int(box_size)
+        # 第k条网格线位于offset + (k-1)*s，条数固定，方便对不同偏移一起计算
+        lines_y = np.clip(np.arange(box_size_int)[:, np.newaxis]
+                          + box_size_int * np.arange(-1, -(-height // box_size_int) + 1), 0, height)
+        lines_x = np.clip(np.arange(box_size_int)[:, np.newaxis]
+                          + box_size_int * np.arange(-1, -(-width // box_size_int) + 1), 0, width)
+        if offsets is None or offsets >= box_size_int ** 2:
+            chosen = {dy: np.arange(box_size_int) for dy in range(box_size_int)}
+        else:
+            flat = rng.choice(box_size_int ** 2 - 1, size=max(offsets - 1, 0), replace=False) + 1
+            flat = np.concatenate(([0], flat))
+            chosen = {dy: flat[flat // box_size_int == dy] % box_size_int
+                      for dy in np.unique(flat // box_size_int)}
+
+        best = None
+        for dy, dxs in chosen.items():
+            rows = table[lines_y[dy]]  # (行网格线数, width+1)
+            corners = rows[:, lines_x[dxs]]  # (行网格线数, 偏移数, 列网格线数)
+            sums = (corners[1:, :, 1:] - corners[:-1, :, 1:]
+                    - corners[1:, :, :-1] + corners[:-1, :, :-1])
+            nonempty = np.count_nonzero(sums, axis=(0, 2)).min()
+            best = nonempty if best is None else min(best, nonempty)
+        counts[box_size] = int(best)
+    return counts
+
+def box_count_multiscale(binary_image, box_sizes):
+    """
+    多尺度盒计数：2的幂次尺寸走占据金字塔，其余尺寸共用一张积分图
+    
+    参数和返回值与box_count相同（打包的图像直接交给box_count处理）
+    """
+    if isinstance(binary_image, PackedBinaryImage):
+        return box_count(binary_image, box_sizes)
+    dyadic = [s for s in box_sizes if s >= 1 and int(s) & (int(s) - 1) == 0]
+    others = [s for s in box_sizes if not (s >= 1 and int(s) & (int(s) - 1) == 0)]
+    counts = box_count_pyramid(binary_image, dyadic) if dyadic else {}
+    if others:
+        counts.update(box_count_sat(binary_image, others))
+    return {box_size: counts[box_size] for box_size in box_sizes}
+
+# 工作进程中附加到共享内存的图像
+_shared_image = None
+
+def _attach_shared_image(name, shape):
+    """进程池初始化函数：附加到父进程创建的共享内存（只读使用）"""
+    from multiprocessing import shared_memory
+
+    global _shared_image
+    shm = shared_memory.SharedMemory(name=name)
+    _shared_image = (shm, np.ndarray(shape, dtype=bool, buffer=shm.buf))
+
+def _box_count_tile(box_size, first_row, last_row):
+    """在共享图像上统计第first_row到last_row个盒子行中的非空盒子数，并返回耗时"""
+    start = time.perf_counter()
+    image = _shared_image[1]
+    num_cols = image.shape[1] // box_size
+    block = image[first_row * box_size:last_row * box_size, :num_cols * box_size]
+    boxes = block.reshape(last_row - first_row, box_size, num_cols, box_size).any(axis=(1, 3))
+    return box_size, int(np.count_nonzero(boxes)), time.perf_counter() - start
+
+def box_count_parallel(binary_image, box_sizes, workers=None, tile_pixels=1 << 22, return_timings=False):
+    """
+    多进程盒计数：把(盒子尺寸, 图块)作为工作单元分配给进程池
+    
+    参数：
+    binary_image -- 二值图像数组
+    box_sizes -- 盒子尺寸列表
+    workers -- 进程数（默认CPU核数）
+    tile_pixels -- 每个图块包含的像素数上限（按整盒子行划分）
+    return_timings -- 为True时同时返回每个尺寸的耗时
+    
+    返回：
+    字典 {box_size: count}；return_timings为True时返回(counts, timings)，
+    timings为 {box_size: 各图块计算时间之和（秒）}
+    
+    图像只复制一次到multiprocessing.shared_memory，各进程只读共享，
+    每个工作单元只返回部分计数，最后在主进程中合并。
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from multiprocessing import shared_memory
+
+    if isinstance(binary_image, PackedBinaryImage):
+        binary_image = binary_image.unpack()
+    height, width = binary_image.shape
+    shm = shared_memory.SharedMemory(create=True, size=max(height * width, 1))
+    try:
+        shared = np.ndarray((height, width), dtype=bool, buffer=shm.buf)
+        np.not_equal(binary_image, 0, out=shared)
+
+        counts = {box_size: 0 for box_size in box_sizes}
+        timings = {box_size: 0.0 for box_size in box_sizes}
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_shared_image,
+                                 initargs=(shm.name, (height, width))) as executor:
+            futures = []
+            for box_size in counts:
+                num_rows = height // box_size
+                rows_per_tile = max(1, tile_pixels // max(box_size * width, 1))
+                for first_row in range(0, num_rows, rows_per_tile):
+                    last_row = min(first_row + rows_per_tile, num_rows)
+                    futures.append(executor.submit(_box_count_tile, box_size, first_row, last_row))
+            for future in as_completed(futures):
+                box_size, count, elapsed = future.result()
+                counts[box_size] += count
+                timings[box_size] += elapsed
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
+
+    counts = {box_size: counts[box_size] for box_size in box_sizes}
+    if return_timings:
+        return counts, {box_size: timings[box_size] for box_size in box_sizes}
+    return counts
+
+def _box_count_loop(binary_image, box_sizes):
+    """
+    逐个盒子遍历的盒计数实现（仅作为向量化版本的对照和基准）
+    
+    参数和返回值与box_count相同
+    """
+    height, width = binary_image.shape
+    counts = {}
+    for box_size in dict.fromkeys(box_sizes):
         num_rows = height // box_size
         num_cols = width // box_size
         count = 0
@@ -69,7 +434,458 @@ def box_count(binary_image, box_sizes):
         counts[box_size] = count
     return counts
 
-def calculate_fractal_dimension(binary_image, min_box_size=1, max_box_size=None, num_sizes=10):
+def iter_image_bands(source, band_height=1024, threshold=None, shape=None, dtype=np.uint8):
+    """
+    按水平带逐块读取二值图像，不把整幅图像读入内存
+    
+    参数：
+    source -- NumPy数组（包括np.memmap）、.npy文件路径、原始二进制文件路径（需给出shape），
+              或PIL可以打开的图像文件路径
+    band_height -- 每带的行数
+    threshold -- 二值化阈值，像素值大于阈值为前景；为None时数组输入按非零判断，
+                 图像文件使用与load_and_binarize_image相同的默认阈值128
+    shape -- 原始二进制文件的形状(height, width)
+    dtype -- 原始二进制文件的数据类型
+    
+    返回：
+    生成器，先产出图像形状(height, width)，然后依次产出(起始行号, 布尔数组)
+    
+    .npy和原始文件通过内存映射读取，峰值内存只与带宽有关。
+    PIL的多数压缩格式（如PNG）在裁剪时会解码整幅图像，超大图像请先转换为.npy或原始文件。
+    """
+    image = None
+    if isinstance(source, str):
+        if source.endswith('.npy'):
+            source = np.load(source, mmap_mode='r')
+        elif shape is not None:
+            source = np.memmap(source, dtype=dtype, mode='r', shape=tuple(shape))
+        else:
+            from PIL import Image
+
+            image = Image.open(source)
+            threshold = 128 if threshold is None else threshold
+
+    if image is not None:
+        width, height = image.size
+        yield height, width
+        for row in range(0, height, band_height):
+            band = np.asarray(image.crop((0, row, width, min(row + band_height, height))).convert('L'))
+            yield row, band > threshold
+        return
+
+    height, width = source.shape
+    yield height, width
+    for row in range(0, height, band_height):
+        band = np.asarray(source[row:row + band_height])
+        yield row, (band != 0) if threshold is None else (band > threshold)
+
+def box_count_banded(source, box_sizes, band_height=1024, threshold=None, shape=None, dtype=np.uint8):
+    """
+    逐带读取图像并增量更新所有盒子尺寸的计数
+    
+    参数：
+    source, band_height, threshold, shape, dtype -- 见iter_image_bands
+    box_sizes -- 盒子尺寸列表
+    
+    返回：
+    字典 {box_size: count}，与对整幅图像调用box_count的结果相同
+    
+    实现步骤：
+    1. 每读入一带，对每个盒子尺寸先在盒子宽度内按列做any，得到(带内行数, 列数)
+    2. 带内完整的盒子行直接reshape后做any并计数
+    3. 跨越带边界的盒子行用一行累加器保存“或”的结果，到盒子行结束时再计数
+    峰值内存由带宽和图像宽度决定，与图像高度无关
+    """
+    bands = iter_image_bands(source, band_height, threshold, shape, dtype)
+    height, width = next(bands)
+    counts = {box_size: 0 for box_size in box_sizes}
+    pending = {box_size: np.zeros(width // box_size, dtype=bool) for box_size in box_sizes}
+
+    for row, band in bands:
+        for box_size in dict.fromkeys(box_sizes):
+            num_cols = width // box_size
+            limit = height // box_size * box_size  # 余数行不参与计数
+            rows = min(band.shape[0], limit - row)
+            if rows <= 0 or num_cols == 0:
+                continue
+            columns = band[:rows, :num_cols * box_size].reshape(rows, num_cols, box_size).any(axis=2)
+            acc = pending[box_size]
+
+            # 接上前一带未结束的盒子行
+            head = min(rows, -row % box_size)
+            if head:
+                acc |= columns[:head].any(axis=0)
+                if (row + head) % box_size == 0:
+                    counts[box_size] += int(np.count_nonzero(acc))
+                    acc[:] = False
+            # 带内完整的盒子行
+            full = (rows - head) // box_size * box_size
+            if full:
+                boxes = columns[head:head + full].reshape(full // box_size, box_size, num_cols).any(axis=1)
+                counts[box_size] += int(np.count_nonzero(boxes))
+            # 留给下一带的部分
+            if head + full < rows:
+                acc |= columns[head + full:].any(axis=0)
+    return counts
+
+def _as_points(points):
+    """把(N,2)坐标数组或复数数组（如科赫曲线的点）统一转换为(N,2)浮点数组"""
+    points = np.asarray(points)
+    if np.iscomplexobj(points):
+        return np.column_stack((points.real.ravel(), points.imag.ravel()))
+    return points.reshape(-1, 2).astype(float, copy=False)
+
+def _point_box_index(points, box_size, origin):
+    """把点量化为整数盒子坐标（列号, 行号）"""
+    return np.floor((points - origin) / box_size).astype(np.int64)
+
+def _point_box_keys(index, num_y):
+    """把盒子坐标编码成一个int64键（列号 * num_y + 行号），行号须在[0, num_y)内"""
+    return index[:, 0] * num_y + index[:, 1]
+
+def point_box_occupancy(points, box_sizes, origin=None):
+    """
+    统计点集在各个盒子尺寸下每个非空盒子中的点数
+    
+    参数：
+    points -- (N,2)坐标数组（如run_ifs的输出），或复数数组（如koch_generator的输出）
+    box_sizes -- 盒子边长列表（与点坐标同单位，可以是小数）
+    origin -- 网格原点(x0, y0)，默认取点集的左下角
+    
+    返回：
+    字典 {box_size: 数组}，数组的每一项是一个非空盒子中的点数
+    
+    实现步骤：
+    1. 对每个盒子尺寸，把点坐标量化为整数盒子坐标
+    2. 把盒子坐标编码为单个整数键，排序后统计每个不同键出现的次数
+    盒计数、信息维数等估计都由这一遍结果得到
+    """
+    points = _as_points(points)
+    origin = points.min(axis=0) if origin is None else np.asarray(origin, dtype=float)
+    occupancy = {}
+    for box_size in dict.fromkeys(box_sizes):
+        # 行数取自量化后的盒子坐标本身，避免与extent // box_size的舍入不一致而使键重叠
+        index = _point_box_index(points, box_size, origin)
+        index -= index.min(axis=0)
+        num_y = int(index[:, 1].max()) + 1
+        _, occupancy[box_size] = np.unique(_point_box_keys(index, num_y), return_counts=True)
+    return occupancy
+
+def box_count_points(points, box_sizes, origin=None):
+    """
+    直接在点集上做盒计数，无需先栅格化成图像
+    
+    参数：
+    points, box_sizes, origin -- 见point_box_occupancy
+    
+    返回：
+    字典 {box_size: count}，记录每个盒子尺寸对应的非空盒子数量
+    """
+    occupancy = point_box_occupancy(points, box_sizes, origin)
+    return {box_size: int(occupancy[box_size].size) for box_size in box_sizes}
+
+def box_count_points_stream(chunks, box_sizes, bounds):
+    """
+    对分块给出的点集做盒计数，内存只与非空盒子数量和单块大小有关
+    
+    参数：
+    chunks -- 可迭代对象，每项是一块点（格式同box_count_points）
+    box_sizes -- 盒子边长列表
+    bounds -- 点集范围(xmin, xmax, ymin, ymax)，流式处理时无法事先扫描，需要给定；
+              超出范围的点会引发ValueError
+    
+    返回：
+    字典 {box_size: count}，与把所有点合并后调用box_count_points(points, box_sizes, (xmin, ymin))相同
+    """
+    xmin, xmax, ymin, ymax = bounds
+    origin = np.array([xmin, ymin], dtype=float)
+    # 与_point_box_index相同的量化方式：范围内任意点的行号都不超过上边界的行号
+    num_y = {box_size: int(np.floor((ymax - ymin) / box_size)) + 1 for box_size in dict.fromkeys(box_sizes)}
+    occupied = {box_size: np.empty(0, dtype=np.int64) for box_size in num_y}
+    pending = {box_size: [] for box_size in num_y}
+    for chunk in chunks:
+        chunk = _as_points(chunk)
+        if chunk.size and ((chunk[:, 0] < xmin).any() or (chunk[:, 0] > xmax).any()
+                           or (chunk[:, 1] < ymin).any() or (chunk[:, 1] > ymax).any()):
+            raise ValueError(f"Points lie outside bounds {bounds}.")
+        for box_size in num_y:
+            index = _point_box_index(chunk, box_size, origin)
+            keys = np.unique(_point_box_keys(index, num_y[box_size]))
+            pending[box_size].append(keys)
+            # 待合并的键超过已有的键时才合并，合并的总代价与键的总数成正比
+            if sum(len(k) for k in pending[box_size]) > len(occupied[box_size]):
+                occupied[box_size] = np.unique(np.concatenate([occupied[box_size]] + pending[box_size]))
+                pending[box_size] = []
+    return {box_size: int(np.unique(np.concatenate([occupied[box_size]] + pending[box_size])).size)
+            for box_size in box_sizes}
+
+def _point_scales(points, min_scale, max_scale, num_scales, min_fraction, max_fraction):
+    """按点集范围生成等比数列的尺度（默认范围为点集范围的min_fraction到max_fraction）"""
+    extent = float(np.max(points.max(axis=0) - points.min(axis=0)))
+    if max_scale is None:
+        max_scale = extent * max_fraction
+    if min_scale is None:
+        min_scale = extent * min_fraction
+    return np.geomspace(max_scale, min_scale, num_scales)
+
+def _fit_log_log(scales, values):
+    """对log(values)和log(scales)做线性回归，返回(斜率, 截距)"""
+    slope, intercept = np.polyfit(np.log(scales), np.log(values), 1)
+    return slope, intercept
+
+def calculate_point_dimension(points, min_box_size=None, max_box_size=None, num_sizes=10):
+    """
+    计算点集的盒维数
+    
+    参数：
+    points -- (N,2)坐标数组或复数数组
+    min_box_size -- 最小盒子边长（默认点集范围的1/1024）
+    max_box_size -- 最大盒子边长（默认点集范围的一半）
+    num_sizes -- 盒子尺寸数量（默认10）
+    
+    返回：
+    盒维数D, 元组(epsilons, N_epsilons, slope, intercept)，与calculate_fractal_dimension相同
+    """
+    return dimension_spectrum(points, min_box_size, max_box_size, num_sizes)['box']
+
+def dimension_spectrum(points, min_box_size=None, max_box_size=None, num_sizes=10):
+    """
+    由同一遍多尺度占据统计同时估计盒维数、信息维数和（基于盒子的）关联维数
+    
+    参数：
+    points -- (N,2)坐标数组或复数数组
+    min_box_size -- 最小盒子边长（默认点集范围的1/1024）
+    max_box_size -- 最大盒子边长（默认点集范围的一半）
+    num_sizes -- 盒子尺寸数量（默认10）
+    
+    返回：
+    字典，键为'box'、'information'、'correlation'，
+    值为(维数, (epsilons, 拟合用的量, slope, intercept))：
+    - 'box': 非空盒子数N(ε)，N ~ ε^(-D0)
+    - 'information': 以e为底的占据熵I(ε) = -Σ p log p，I ~ -D1 log ε，
+      拟合量为exp(I)以便与其他两项一样在log-log坐标下拟合
+    - 'correlation': Σ p^2 ~ ε^(D2)
+    其中p是盒子中的点数占总点数的比例，点的密度会影响后两项
+    """
+    points = _as_points(points)
+    box_sizes = _point_scales(points, min_box_size, max_box_size, num_sizes, 1 / 1024, 1 / 2)
+    occupancy = point_box_occupancy(points, box_sizes)
+    epsilons = np.array(box_sizes)
+    N_epsilons = np.array([occupancy[s].size for s in box_sizes])
+    probabilities = [occupancy[s] / len(points) for s in box_sizes]
+    entropy = np.array([-np.sum(p * np.log(p)) for p in probabilities])
+    collision = np.array([np.sum(p * p) for p in probabilities])
+
+    spectrum = {}
+    for name, values, sign in (('box', N_epsilons, -1), ('information', np.exp(entropy), -1),
+                               ('correlation', collision, 1)):
+        slope, intercept = _fit_log_log(epsilons, values)
+        spectrum[name] = (sign * slope, (epsilons, values, slope, intercept))
+    return spectrum
+
+def information_dimension(points, min_box_size=None, max_box_size=None, num_sizes=10):
+    """
+    计算点集（测度）的信息维数D1
+    
+    参数和返回值的格式与calculate_point_dimension相同，拟合的量为exp(I(ε))，见dimension_spectrum
+    """
+    return dimension_spectrum(points, min_box_size, max_box_size, num_sizes)['information']
+
+def _morton(x, y):
+    """把非负整数坐标(x, y)按位交错成Z序编码，同一个四叉树格子中的点编码相邻"""
+    codes = []
+    for v in (x, y):
+        v = np.asarray(v).astype(np.uint64)
+        for shift, mask in ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F),
+                            (2, 0x3333333333333333), (1, 0x5555555555555555)):
+            v = (v | (v << np.uint64(shift))) & np.uint64(mask)
+        codes.append(v)
+    return codes[0] | (codes[1] << np.uint64(1))
+
+def _expand_pairs(points, first, lo, hi, radius2, max_candidates):
+    """逐个比较点first[k]与排序后下标在[lo[k], hi[k])中的点，候选点对分批展开以限制内存"""
+    counts = hi - lo
+    cumulative = np.cumsum(counts)
+    total, start = 0, 0
+    while start < len(counts):
+        base = cumulative[start - 1] if start else 0
+        stop = max(start + 1, int(np.searchsorted(cumulative, base + max_candidates, side='right')))
+        c = counts[start:stop]
+        if c.sum():
+            within = np.arange(c.sum()) - np.repeat(np.cumsum(c) - c, c)
+            diff = points[np.repeat(first[start:stop], c)] - points[np.repeat(lo[start:stop], c) + within]
+            total += int(np.count_nonzero(np.einsum('ij,ij->i', diff, diff) < radius2))
+        start = stop
+    return total
+
+def _count_close_pairs(points, radius, leaf_pairs=64, max_candidates=1 << 22):
+    """
+    用四叉树上的双树遍历统计距离小于radius的点对数（每对只计一次）
+    
+    点按Z序排序后，四叉树每层的格子都是一段连续的下标。从边长为radius的格子
+    （自身和右、右上、右下、上方四个相邻格子）开始，按两格点集的包围盒分类：
+    最远距离小于radius的格子对直接计入|a|·|b|，最近距离不小于radius的丢弃，
+    其余细分到下一层，点数乘积不超过leaf_pairs时才逐对比较
+    """
+    origin = points.min(axis=0)
+    top = int(np.max((points.max(axis=0) - origin) / radius)) + 3
+    depth = max(0, min(16, 31 - top.bit_length()))
+    fine = np.floor((points - origin) / radius * 2 ** depth).astype(np.int64) + 2 ** depth
+    codes = _morton(fine[:, 0], fine[:, 1])
+    order = np.argsort(codes, kind='stable')
+    codes, points, fine = codes[order], points[order], fine[order]
+    radius2 = radius * radius
+    n = len(points)
+
+    def cells(level):
+        keys = codes >> np.uint64(2 * (depth - level))
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        ends = np.r_[starts[1:], n]
+        box = np.stack([np.minimum.reduceat(points, starts), np.maximum.reduceat(points, starts)])
+        return keys[starts], starts, ends, box
+
+    keys, starts, ends, box = cells(0)
+    coarse = fine[starts] >> depth
+    A, B = [np.arange(len(starts))], [np.arange(len(starts))]
+    for dx, dy in ((1, -1), (1, 0), (1, 1), (0, 1)):
+        neighbour = _morton(coarse[:, 0] + dx, coarse[:, 1] + dy)
+        index = np.minimum(np.searchsorted(keys, neighbour), len(keys) - 1)
+        found = keys[index] == neighbour
+        A.append(np.flatnonzero(found))
+        B.append(index[found])
+    A, B = np.concatenate(A), np.concatenate(B)
+
+    total = 0
+    leaves = []
+    for level in range(depth + 1):
+        gap = np.maximum(0, np.maximum(box[0, A] - box[1, B], box[0, B] - box[1, A]))
+        span = np.maximum(box[1, A] - box[0, B], box[1, B] - box[0, A])
+        near = np.einsum('ij,ij->i', gap, gap) < radius2
+        inside = np.einsum('ij,ij->i', span, span) < radius2
+        size_a, size_b = ends[A] - starts[A], ends[B] - starts[B]
+        same = A == B
+        full = near & inside
+        total += int(np.sum(np.where(same, size_a * (size_a - 1) // 2, size_a * size_b)[full]))
+        split = near & ~inside
+        leaf = split & ((size_a * size_b <= leaf_pairs) | (level == depth))
+        leaves.append((starts[A[leaf]], ends[A[leaf]], starts[B[leaf]], ends[B[leaf]], same[leaf]))
+        split &= ~leaf
+        if not split.any():
+            break
+        A, B, same = A[split], B[split], same[split]
+        next_keys, next_starts, next_ends, next_box = cells(level + 1)
+        first_a, first_b = np.searchsorted(next_starts, starts[A]), np.searchsorted(next_starts, starts[B])
+        count_a = np.searchsorted(next_starts, ends[A]) - first_a
+        count_b = np.searchsorted(next_starts, ends[B]) - first_b
+        combos = count_a * count_b
+        parent = np.repeat(np.arange(len(A)), combos)
+        within = np.arange(combos.sum()) - np.repeat(np.cumsum(combos) - combos, combos)
+        A = first_a[parent] + within // count_b[parent]
+        B = first_b[parent] + within % count_b[parent]
+        # 同一格子内部的子格子对只保留A<=B，每对只计一次
+        keep = ~same[parent] | (A <= B)
+        A, B = A[keep], B[keep]
+        starts, ends, box = next_starts, next_ends, next_box
+
+    a0, a1, b0, b1, same = (np.concatenate(column) for column in zip(*leaves))
+    size_a = a1 - a0
+    first = np.repeat(a0, size_a) + np.arange(size_a.sum()) - np.repeat(np.cumsum(size_a) - size_a, size_a)
+    lo, hi = np.repeat(b0, size_a), np.repeat(b1, size_a)
+    # 同一格子内只比较排在自己之后的点
+    lo = np.where(np.repeat(same, size_a), first + 1, lo)
+    lo = np.minimum(lo, hi)
+    if instrumentation.enabled:
+        instrumentation.count('count_close_pairs.pairs_compared', int(np.sum(hi - lo)))
+    return total + _expand_pairs(points, first, lo, hi, radius2, max_candidates)
+
+def correlation_dimension(points, radii=None, num_radii=10, max_points=50000, seed=None):
+    """
+    用关联积分计算点集的关联维数D2
+    
+    参数：
+    points -- (N,2)坐标数组或复数数组
+    radii -- 半径列表（默认点集范围的1/512到1/8之间等比取num_radii个）
+    num_radii -- 默认半径的个数
+    max_points -- 点数超过该值时随机均匀抽样（默认50000，C(r)的估计仍是无偏的；None表示使用全部点）
+    seed -- 抽样的随机数种子
+    
+    返回：
+    关联维数D2, 元组(radii, C, slope, intercept)，C(r)为距离小于r的点对比例，C ~ r^D2
+    
+    点对计数使用四叉树双树遍历，只有距离接近r的点对需要逐对比较，
+    对自相似点集代价约为O(N^1.5)；默认的最大半径下5万个点约需3秒
+    """
+    points = _as_points(points)
+    if max_points is not None and len(points) > max_points:
+        rng = np.random.default_rng(seed)
+        points = points[rng.choice(len(points), max_points, replace=False)]
+    if radii is None:
+        radii = _point_scales(points, None, None, num_radii, 1 / 512, 1 / 8)
+    radii = np.asarray(radii, dtype=float)
+    n = len(points)
+    C = np.array([2.0 * _count_close_pairs(points, r) / (n * (n - 1)) for r in radii])
+    slope, intercept = _fit_log_log(radii, C)
+    return slope, (radii, C, slope, intercept)
+
+def mass_dimension(points, radii=None, num_radii=10, num_centers=1, seed=None):
+    """
+    计算点集的质量维数：以集合上的点为中心，半径r内的点数M(r) ~ r^D
+    
+    参数：
+    points -- (N,2)坐标数组或复数数组
+    radii -- 半径列表（默认点集范围的1/256到1/4之间等比取num_radii个）
+    num_radii -- 默认半径的个数
+    num_centers -- 中心点个数；第一个中心取最靠近点集中位数的点，其余随机抽取，结果取几何平均
+    seed -- 抽取中心的随机数种子
+    
+    返回：
+    质量维数D, 元组(radii, M, slope, intercept)
+    """
+    points = _as_points(points)
+    if radii is None:
+        radii = _point_scales(points, None, None, num_radii, 1 / 256, 1 / 4)
+    radii = np.asarray(radii, dtype=float)
+    centers = [np.argmin(np.sum((points - np.median(points, axis=0)) ** 2, axis=1))]
+    if num_centers > 1:
+        rng = np.random.default_rng(seed)
+        centers.extend(rng.choice(len(points), num_centers - 1, replace=False))
+    log_mass = []
+    for center in centers:
+        distances = np.sort(np.sqrt(np.sum((points - points[center]) ** 2, axis=1)))
+        log_mass.append(np.log(np.searchsorted(distances, radii, side='left')))
+    M = np.exp(np.mean(log_mass, axis=0))
+    slope, intercept = _fit_log_log(radii, M)
+    return slope, (radii, M, slope, intercept)
+
+def geometric_box_sizes(min_box_size, max_box_size, num_sizes):
+    """
+    生成从大到小的等比整数盒子尺寸，并去掉取整后重复的尺寸
+    
+    参数：
+    min_box_size -- 最小盒子尺寸
+    max_box_size -- 最大盒子尺寸
+    num_sizes -- 等比数列的项数（去重后可能更少）
+    
+    返回：
+    互不相同的整数盒子尺寸数组（从大到小）
+    """
+    box_sizes = np.geomspace(max_box_size, min_box_size, num_sizes, dtype=int)
+    return np.unique(box_sizes)[::-1]
+
+def _count_boxes(binary_image, box_sizes, method, workers=None):
+    """按指定方式计算盒子计数，见calculate_fractal_dimension的method参数"""
+    if method == 'vectorized':
+        return box_count(binary_image, box_sizes)
+    if method == 'multiscale':
+        return box_count_multiscale(binary_image, box_sizes)
+    if method == 'parallel':
+        return box_count_parallel(binary_image, box_sizes, workers=workers)
+    if method == 'min_offset':
+        return box_count_min_offset(binary_image, box_sizes)
+    raise ValueError(f"Unknown box counting method: {method}")
+
+def calculate_fractal_dimension(binary_image, min_box_size=1, max_box_size=None, num_sizes=10,
+                                method='vectorized', workers=None):
     """
     计算分形维数
     
@@ -77,13 +893,18 @@ def calculate_fractal_dimension(binary_image, min_box_size=1, max_box_size=None,
     binary_image -- 二值图像数组
     min_box_size -- 最小盒子尺寸（默认1）
     max_box_size -- 最大盒子尺寸（默认图像最小尺寸的一半）
-    num_sizes -- 盒子尺寸数量（默认10）
+    num_sizes -- 盒子尺寸数量（默认10，取整后重复的尺寸只计算一次）
+    method -- 盒计数方式：'vectorized'逐个尺寸调用box_count，
+              'multiscale'调用box_count_multiscale一次计算所有尺寸，
+              'parallel'调用box_count_parallel用多进程计算，
+              'min_offset'调用box_count_min_offset取所有网格偏移下的最小计数
+    workers -- method为'parallel'时的进程数（默认CPU核数）
     
     返回：
     盒维数D, 元组(epsilons, N_epsilons, slope, intercept)
     
     实现步骤：
-    1. 生成等比数列的盒子尺寸
+    1. 生成等比数列的盒子尺寸并去重
     2. 调用box_count获取计数结果
     3. 对结果进行对数变换
     4. 使用线性回归计算斜率
@@ -92,8 +913,8 @@ def calculate_fractal_dimension(binary_image, min_box_size=1, max_box_size=None,
     # ... your code here ...
     if max_box_size is None:
         max_box_size = min(binary_image.shape) // 2
-    box_sizes = np.geomspace(max_box_size, min_box_size, num_sizes, dtype=int)
-    counts = box_count(binary_image, box_sizes)
+    box_sizes = geometric_box_sizes(min_box_size, max_box_size, num_sizes)
+    counts = _count_boxes(binary_image, box_sizes, method, workers)
     epsilons = np.array(list(counts.keys()))
     N_epsilons = np.array(list(counts.values()))
     log_eps = np.log(epsilons)
@@ -102,6 +923,116 @@ def calculate_fractal_dimension(binary_image, min_box_size=1, max_box_size=None,
     D = -slope
     return D, (epsilons, N_epsilons, slope, intercept)
 
+# 95%置信区间的t分布临界值（自由度1到30）
+_T_CRITICAL_95 = np.array([
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+])
+
+def _t_critical_95(df):
+    """双侧95%的t分布临界值，自由度大于30时用1.96 + 2.4/df近似"""
+    df = np.asarray(df)
+    table = _T_CRITICAL_95[np.clip(df, 1, 30) - 1]
+    return np.where(df <= 30, table, 1.96 + 2.4 / np.maximum(df, 1))
+
+def fit_scaling_range(epsilons, N_epsilons, min_points=4, r2_threshold=0.999):
+    """
+    自动选择log-log图中的线性区间并拟合
+    
+    参数：
+    epsilons -- 盒子尺寸数组
+    N_epsilons -- 对应的盒子计数数组
+    min_points -- 区间内最少的尺寸个数（默认4）
+    r2_threshold -- 视为线性的决定系数下限（默认0.999）
+    
+    返回：
+    字典，包含：
+    dimension -- 维数估计（斜率的相反数）
+    range -- 选中的盒子尺寸区间(最小尺寸, 最大尺寸)
+    ci -- 维数的95%置信区间(下限, 上限)
+    slope, intercept, stderr, r2 -- 选中区间的拟合结果
+    mask -- 布尔数组，标记参与拟合的尺寸
+    
+    实现步骤：
+    1. 去掉计数为0的尺寸，按尺寸从小到大排序
+    2. 用x、y、x^2、xy、y^2的累积和，一次性向量化地算出所有连续区间的最小二乘拟合
+    3. 在决定系数不低于阈值的区间中选择跨度（以log尺寸计）最大的，
+       跨度相同时选斜率标准误最小的；没有区间达到阈值时选决定系数最大的
+    """
+    epsilons = np.asarray(epsilons, dtype=float)
+    N_epsilons = np.asarray(N_epsilons, dtype=float)
+    valid = N_epsilons > 0
+    order = np.argsort(epsilons[valid])
+    sizes = epsilons[valid][order]
+    x = np.log(sizes)
+    y = np.log(N_epsilons[valid][order])
+    n = len(x)
+    min_points = max(min_points, 3)
+    if n < min_points:
+        raise ValueError(f"Need at least {min_points} non-empty box sizes, got {n}.")
+
+    def cumulative(values):
+        return np.concatenate(([0.0], np.cumsum(values)))
+
+    Sx, Sy, Sxx, Sxy, Syy = (cumulative(v) for v in (x, y, x * x, x * y, y * y))
+    # 区间[i, j)的所有组合，i为起点，j为终点（不含）
+    i, j = np.triu_indices(n + 1, k=min_points)
+    m = (j - i).astype(float)
+    sx, sy = Sx[j] - Sx[i], Sy[j] - Sy[i]
+    sxx = Sxx[j] - Sxx[i] - sx * sx / m
+    sxy = Sxy[j] - Sxy[i] - sx * sy / m
+    syy = Syy[j] - Syy[i] - sy * sy / m
+    slope = sxy / sxx
+    sse = np.maximum(syy - slope * sxy, 0.0)
+    r2 = np.where(syy > 0, 1 - sse / np.where(syy > 0, syy, 1), 1.0)
+    stderr = np.sqrt(sse / (m - 2) / sxx)
+    span = x[j - 1] - x[i]
+
+    good = r2 >= r2_threshold
+    if good.any():
+        candidates = np.flatnonzero(good)
+        best = candidates[np.lexsort((stderr[candidates], -span[candidates]))[0]]
+    else:
+        best = int(np.argmax(r2))
+
+    half_width = _t_critical_95(int(m[best]) - 2) * stderr[best]
+    dimension = -slope[best]
+    intercept = (sy[best] - slope[best] * sx[best]) / m[best]
+    eps_min, eps_max = sizes[i[best]], sizes[j[best] - 1]
+    return {
+        'dimension': float(dimension),
+        'range': (float(eps_min), float(eps_max)),
+        'ci': (float(dimension - half_width), float(dimension + half_width)),
+        'slope': float(slope[best]),
+        'intercept': float(intercept),
+        'stderr': float(stderr[best]),
+        'r2': float(r2[best]),
+        'mask': valid & (epsilons >= eps_min) & (epsilons <= eps_max),
+    }
+
+def calculate_fractal_dimension_auto(binary_image, min_box_size=1, max_box_size=None, num_sizes=20,
+                                     method='vectorized', workers=None, min_points=4, r2_threshold=0.999):
+    """
+    计算分形维数，并自动排除饱和的过小和过大盒子尺寸
+    
+    参数：
+    binary_image, min_box_size, max_box_size, method, workers -- 同calculate_fractal_dimension
+    num_sizes -- 盒子尺寸数量（默认20，取整后重复的尺寸只计算一次）
+    min_points, r2_threshold -- 同fit_scaling_range
+    
+    返回：
+    盒维数D, 元组(epsilons, N_epsilons, fit)，fit为fit_scaling_range返回的字典
+    """
+    if max_box_size is None:
+        max_box_size = min(binary_image.shape) // 2
+    box_sizes = geometric_box_sizes(min_box_size, max_box_size, num_sizes)
+    counts = _count_boxes(binary_image, box_sizes, method, workers)
+    epsilons = np.array(list(counts.keys()))
+    N_epsilons = np.array(list(counts.values()))
+    fit = fit_scaling_range(epsilons, N_epsilons, min_points, r2_threshold)
+    return fit['dimension'], (epsilons, N_epsilons, fit)
+
 def plot_log_log(epsilons, N_epsilons, slope, intercept, save_path=None):
     """
     绘制log-log图
@@ -121,6 +1052,8 @@ def plot_log_log(epsilons, N_epsilons, slope, intercept, save_path=None):
     """
     # TODO: 实现log-log图绘制
     # ... your code here ...
+    import matplotlib.pyplot as plt  # 首次绘图时才导入
+
     log_eps = np.log(epsilons)
     log_N = np.log(N_epsilons)
     plt.scatter(log_eps, log_N, label='Data points')
@@ -1,4 +1,6 @@
 import unittest
+import tempfile
+import tracemalloc
 import numpy as np
 from PIL import Image
 import os
@@ -7,11 +9,29 @@ from pathlib import Path
 
 # 添加父目录到Python路径
 sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent.parent))  # 仪表模块instrumentation
 
 # 导入解决方案代码  
 #from solution.box_counting_solution import load_and_binarize_image, box_count, calculate_fractal_dimension
 # 导入学生代码
 from box_counting import load_and_binarize_image, box_count, calculate_fractal_dimension
+from box_counting import _box_count_loop, box_count_pyramid, box_count_sat, box_count_multiscale
+from box_counting import PackedBinaryImage
+from box_counting import box_count_points, box_count_points_stream, calculate_point_dimension
+from box_counting import box_count_banded, box_count_parallel, box_count_min_offset
+from box_counting import dimension_spectrum, correlation_dimension, mass_dimension
+from box_counting import _count_close_pairs
+from box_counting import geometric_box_sizes, fit_scaling_range, calculate_fractal_dimension_auto
+import instrumentation
+
+
+def sierpinski_points(num_points, seed=0, digits=24):
+    """按随机的三进制展开生成谢尔宾斯基三角形上均匀分布的点"""
+    rng = np.random.default_rng(seed)
+    vertices = np.array([[0.0, 0.0], [1.0, 0.0], [0.5, np.sqrt(3) / 2]])
+    choices = rng.integers(0, 3, (num_points, digits))
+    weights = 0.5 ** np.arange(1, digits + 1)
+    return np.einsum('nk,nkd->nd', np.broadcast_to(weights, choices.shape), vertices[choices])
 
 
 class TestBoxCounting(unittest.TestCase):
@@ -44,6 +64,214 @@ class TestBoxCounting(unittest.TestCase):
         expected = {1:4, 2:1, 3:4, 6:1}
         self.assertEqual(counts, expected)
 
+    def test_box_count_matches_loop(self):
+        """测试向量化盒计数与逐个盒子遍历的结果完全一致"""
+        rng = np.random.default_rng(0)
+        test_array = (rng.random((101, 77)) < 0.05).astype(int)
+        box_sizes = [1, 2, 3, 5, 7, 16, 50, 77, 120]
+        self.assertEqual(box_count(test_array, box_sizes), _box_count_loop(test_array, box_sizes))
+
+    def test_multiscale_box_count(self):
+        """测试占据金字塔和积分图与box_count结果一致"""
+        rng = np.random.default_rng(1)
+        test_array = (rng.random((203, 150)) < 0.02).astype(int)
+        dyadic = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+        self.assertEqual(box_count_pyramid(test_array, dyadic), box_count(test_array, dyadic))
+        box_sizes = [1, 3, 5, 6, 12, 16, 33, 100]
+        self.assertEqual(box_count_sat(test_array, box_sizes), box_count(test_array, box_sizes))
+        self.assertEqual(box_count_multiscale(test_array, box_sizes), box_count(test_array, box_sizes))
+        with self.assertRaises(ValueError):
+            box_count_pyramid(test_array, [3])
+
+    def test_packed_box_count(self):
+        """测试在打包比特上的盒计数与原始数组一致"""
+        rng = np.random.default_rng(2)
+        test_array = (rng.random((150, 213)) < 0.01).astype(int)
+        packed = PackedBinaryImage.from_array(test_array, band_rows=64)
+        np.testing.assert_array_equal(packed.unpack(), test_array)
+        box_sizes = [1, 2, 3, 4, 5, 8, 16, 24, 64, 128, 300]
+        self.assertEqual(box_count(packed, box_sizes), box_count(test_array, box_sizes))
+        loaded = load_and_binarize_image(self.test_image_path, packed=True)
+        self.assertEqual(loaded.shape, (32, 32))
+        self.assertEqual(box_count(loaded, [1, 8]), {1: 256, 8: 4})
+
+    def test_packed_from_grayscale(self):
+        """测试逐带二值化打包：结果与整幅二值化一致，内存峰值远小于整幅图像"""
+        rng = np.random.default_rng(4)
+        gray = (rng.random((1000, 1000)) * 255).astype(np.uint8)
+        expected = PackedBinaryImage.from_array(gray > 100)
+        by_array = PackedBinaryImage.from_array(gray, band_rows=37, threshold=100)
+        np.testing.assert_array_equal(by_array.bits, expected.bits)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'gray.png')
+            Image.fromarray(gray).save(path)
+            image = Image.open(path).convert('L')
+            image.load()
+            tracemalloc.start()
+            try:
+                packed = PackedBinaryImage.from_image(image, threshold=100, band_rows=16)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            np.testing.assert_array_equal(packed.bits, expected.bits)
+            self.assertLess(peak, gray.size // 2)
+            np.testing.assert_array_equal(load_and_binarize_image(path, 100, packed=True).bits, expected.bits)
+
+    def test_box_count_points(self):
+        """测试点集盒计数：与栅格化结果一致，流式版本与一次性版本一致"""
+        rng = np.random.default_rng(3)
+        test_array = (rng.random((64, 96)) < 0.03).astype(int)
+        rows, cols = np.nonzero(test_array)
+        points = np.column_stack((cols + 0.5, rows + 0.5))  # 像素中心
+        box_sizes = [1, 2, 4, 8, 16, 32]
+        self.assertEqual(box_count_points(points, box_sizes, origin=(0, 0)), box_count(test_array, box_sizes))
+        chunks = np.array_split(points, 7)
+        self.assertEqual(box_count_points_stream(chunks, box_sizes, bounds=(0, 96, 0, 64)),
+                         box_count_points(points, box_sizes, origin=(0, 0)))
+        # 复数数组形式的点
+        self.assertEqual(box_count_points(points[:, 0] + 1j * points[:, 1], box_sizes, origin=(0, 0)),
+                         box_count(test_array, box_sizes))
+
+    def test_box_count_points_fractional(self):
+        """测试小数盒子尺寸：与逐点量化后去重的结果一致，流式版本拒绝范围外的点"""
+        self.assertEqual(box_count_points([[0, 0], [0, 1], [0.1, 0]], [0.1]), {0.1: 3})
+        rng = np.random.default_rng(11)
+        for _ in range(200):
+            points = np.round(rng.random((30, 2)) * rng.integers(1, 5), 1)
+            box_size = float(rng.choice([0.05, 0.1, 0.2, 0.3, 0.7]))
+            index = np.floor((points - points.min(axis=0)) / box_size)
+            expected = len({tuple(row) for row in index})
+            self.assertEqual(box_count_points(points, [box_size])[box_size], expected)
+            bounds = (points[:, 0].min(), points[:, 0].max(), points[:, 1].min(), points[:, 1].max())
+            self.assertEqual(box_count_points_stream(np.array_split(points, 3), [box_size], bounds)[box_size],
+                             expected)
+        with self.assertRaises(ValueError):
+            box_count_points_stream([np.array([[0.5, 0.5], [2.0, 0.5]])], [0.1], bounds=(0, 1, 0, 1))
+
+    def test_point_dimension(self):
+        """测试谢尔宾斯基三角形点集的盒维数"""
+        points = sierpinski_points(200000)
+        D, _ = calculate_point_dimension(points, min_box_size=1 / 256, max_box_size=1 / 4)
+        self.assertAlmostEqual(D, np.log(3) / np.log(2), delta=0.05)
+
+    def test_dimension_spectrum(self):
+        """测试信息维数、关联维数和质量维数"""
+        points = sierpinski_points(100000, seed=1)
+        expected = np.log(3) / np.log(2)
+        spectrum = dimension_spectrum(points, min_box_size=1 / 256, max_box_size=1 / 4)
+        for name in ('box', 'information', 'correlation'):
+            self.assertAlmostEqual(spectrum[name][0], expected, delta=0.08, msg=name)
+        D2, _ = correlation_dimension(points, radii=np.geomspace(1 / 256, 1 / 16, 6), max_points=20000, seed=0)
+        self.assertAlmostEqual(D2, expected, delta=0.1)
+        D, _ = mass_dimension(points, radii=np.geomspace(1 / 128, 1 / 8, 6), num_centers=5, seed=0)
+        self.assertAlmostEqual(D, expected, delta=0.2)
+
+    def test_count_close_pairs(self):
+        """测试网格哈希的点对计数与暴力计算一致"""
+        rng = np.random.default_rng(8)
+        points = rng.random((400, 2))
+        distances = np.sqrt(((points[:, None] - points[None]) ** 2).sum(axis=2))
+        for radius in (0.01, 0.05, 0.2):
+            expected = (np.count_nonzero(distances < radius) - len(points)) // 2
+            self.assertEqual(_count_close_pairs(points, radius, max_candidates=1000), expected)
+        # 重复点、共线点，以及较小的叶子阈值（迫使四叉树细分多层）
+        points = np.round(rng.random((300, 2)), 1)
+        points[:100, 1] = 0.5
+        distances = np.sqrt(((points[:, None] - points[None]) ** 2).sum(axis=2))
+        for radius in (0.05, 0.1, 0.3):
+            expected = (np.count_nonzero(distances < radius) - len(points)) // 2
+            self.assertEqual(_count_close_pairs(points, radius, leaf_pairs=2), expected)
+
+    def test_correlation_dimension_scaling(self):
+        """测试关联积分只逐对比较距离接近r的点对，点数增加4倍时比较次数远少于16倍"""
+        compared = []
+        for num_points in (4000, 16000):
+            with instrumentation.Collector() as stats:
+                D2, (radii, _, _, _) = correlation_dimension(sierpinski_points(num_points, seed=1))
+            pairs = stats.counters['count_close_pairs.pairs_compared']
+            self.assertLess(pairs, 0.01 * len(radii) * num_points ** 2 / 2)
+            self.assertAlmostEqual(D2, np.log(3) / np.log(2), delta=0.1)
+            compared.append(pairs)
+        self.assertLess(compared[1], 10 * compared[0])
+
+    def test_box_count_banded(self):
+        """测试逐带读取的盒计数与整幅图像计数一致"""
+        rng = np.random.default_rng(5)
+        test_array = (rng.random((131, 90)) < 0.02).astype(np.uint8)
+        box_sizes = [1, 2, 3, 7, 16, 50]
+        expected = box_count(test_array, box_sizes)
+        self.assertEqual(box_count_banded(test_array, box_sizes, band_height=10), expected)
+        # 重复的尺寸只计数一次
+        self.assertEqual(box_count_banded(test_array, [2, 2, 7], band_height=10), {2: expected[2], 7: expected[7]})
+        with tempfile.TemporaryDirectory() as directory:
+            npy_path = os.path.join(directory, 'image.npy')
+            np.save(npy_path, test_array)
+            self.assertEqual(box_count_banded(npy_path, box_sizes, band_height=17), expected)
+            raw_path = os.path.join(directory, 'image.raw')
+            test_array.tofile(raw_path)
+            self.assertEqual(box_count_banded(raw_path, box_sizes, band_height=64, shape=(131, 90)), expected)
+        image = load_and_binarize_image(self.test_image_path)
+        self.assertEqual(box_count_banded(self.test_image_path, [1, 3, 8], band_height=5),
+                         box_count(image, [1, 3, 8]))
+
+    def test_box_count_parallel(self):
+        """测试多进程盒计数与单进程结果一致并返回各尺寸耗时"""
+        rng = np.random.default_rng(6)
+        test_array = (rng.random((120, 140)) < 0.02).astype(int)
+        box_sizes = [1, 2, 5, 16, 64]
+        counts, timings = box_count_parallel(test_array, box_sizes, workers=2, tile_pixels=2000,
+                                             return_timings=True)
+        self.assertEqual(counts, box_count(test_array, box_sizes))
+        self.assertEqual(sorted(timings), box_sizes)
+        self.assertTrue(all(t >= 0 for t in timings.values()))
+
+    def test_box_count_min_offset(self):
+        """测试网格偏移最小计数与逐个偏移平移图像后计数的结果一致"""
+        rng = np.random.default_rng(7)
+        test_array = (rng.random((24, 30)) < 0.05).astype(int)
+        box_sizes = [1, 3, 4, 6]
+        counts = box_count_min_offset(test_array, box_sizes)
+        for box_size in box_sizes:
+            expected = None
+            for dy in range(box_size):
+                for dx in range(box_size):
+                    # 在左上角补(s-dy, s-dx)行列的空白，再补齐到s的整数倍，等价于网格偏移(dy, dx)
+                    top, left = (box_size - dy) % box_size, (box_size - dx) % box_size
+                    padded = np.pad(test_array, ((top, box_size), (left, box_size)))
+                    count = box_count(padded, [box_size])[box_size]
+                    expected = count if expected is None else min(expected, count)
+            self.assertEqual(counts[box_size], expected)
+        sampled = box_count_min_offset(test_array, [6], offsets=5, seed=0)
+        self.assertGreaterEqual(sampled[6], counts[6])
+        self.assertLessEqual(sampled[6], box_count(test_array, [6])[6])
+
+    def test_geometric_box_sizes_unique(self):
+        """测试盒子尺寸去重且不会重复计数"""
+        box_sizes = geometric_box_sizes(1, 8, 20)
+        self.assertEqual(list(box_sizes), [8, 7, 6, 5, 4, 3, 2, 1])
+        test_array = np.ones((16, 16), dtype=int)
+        self.assertEqual(box_count_banded(test_array, [2, 2, 4], band_height=3), {2: 64, 4: 16})
+
+    def test_fit_scaling_range(self):
+        """测试自动选择线性区间：两端饱和的尺寸应被排除"""
+        epsilons = 2.0 ** np.arange(12)
+        noise = np.exp(np.random.default_rng(9).normal(0, 0.01, epsilons.size))
+        N_epsilons = 1e6 * epsilons ** -1.5 * noise
+        N_epsilons[:3] = N_epsilons[3]  # 小尺寸饱和
+        N_epsilons[-2:] = N_epsilons[-3]  # 大尺寸饱和
+        fit = fit_scaling_range(epsilons, N_epsilons)
+        self.assertAlmostEqual(fit['dimension'], 1.5, delta=0.02)
+        self.assertEqual(fit['range'], (8.0, 512.0))
+        self.assertLess(fit['ci'][0], fit['dimension'])
+        self.assertGreater(fit['ci'][1], fit['dimension'])
+        self.assertLess(fit['ci'][1] - fit['ci'][0], 0.05)
+
+        test_array = np.zeros((256, 256), dtype=int)
+        test_array[64:192, 64:192] = 1
+        D, (epsilons, N_epsilons, fit) = calculate_fractal_dimension_auto(test_array)
+        self.assertEqual(len(set(epsilons)), len(epsilons))
+        self.assertAlmostEqual(D, 2.0, delta=0.1)
+
     def test_fractal_dimension(self):
         """测试分形维数计算"""
         test_array = np.zeros((128,128), dtype=int)  # 增大测试图像尺寸
@@ -65,5 +293,16 @@ class TestBoxCounting(unittest.TestCase):
         self.assertGreater(D, 1.5, "分形维数应大于1.5")
         self.assertLess(D, 2.5, "分形维数应小于2.5")
 
+    def test_instrumentation(self):
+        """仪表开启时记录每个尺度扫描的盒子数"""
+        image = np.zeros((20, 30), dtype=np.uint8)
+        image[3, 4] = 1
+        with instrumentation.Collector() as stats:
+            box_count(image, [1, 4, 8])
+        self.assertEqual(stats.counters['box_count.boxes_scanned[1]'], 600)
+        self.assertEqual(stats.counters['box_count.boxes_scanned[4]'], 35)
+        self.assertEqual(stats.counters['box_count.boxes_scanned[8]'], 6)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,231 @@
+"""
+五个实验热点函数的基准测试与回归比较
+
+用法：
+python benchmarks/run_benchmarks.py run [--quick] [--repeat N] [--min-time 0.2] [-o results.json]
+python benchmarks/run_benchmarks.py compare old.json new.json [--threshold 1.2]
+
+run 对每个热点函数在一组规模参数下测量墙钟时间、峰值内存（tracemalloc）和吞吐量，
+结果写入JSON。和timeit一样，每轮计时把函数连续调用多次，直到一轮至少min_time秒，
+重复repeat轮取单次调用的最短时间，微秒级的用例也能稳定比较。
+compare 按(名称, 参数)配对两次结果，耗时或峰值内存的比值超过阈值即视为回归；
+基线中有而新结果中没有的用例报告为缺失。存在回归或缺失时以状态码1退出。
+"""
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+# 把五个实验目录加入Python路径，以便导入各实验的模块
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))  # 仓库根目录下的仪表模块instrumentation
+for prefix in ('Exp1-', 'Exp2-', 'Exp3-', 'Exp4-', 'Exp5-'):
+    for directory in sorted(ROOT.glob(prefix + '*')):
+        sys.path.insert(0, str(directory))
+
+from Iteration_koch_minkowski import koch_generator, minkowski_generator  # noqa: E402
+from L_system import apply_rules, l_system_segments  # noqa: E402
+from ifs import get_fern_params, run_ifs  # noqa: E402
+from mandelbrot_julia import generate_mandelbrot, generate_julia  # noqa: E402
+from box_counting import box_count, calculate_fractal_dimension  # noqa: E402
+
+
+def _random_image(size, density=0.02, seed=0):
+    """生成随机二值测试图像"""
+    rng = np.random.default_rng(seed)
+    return (rng.random((size, size)) < density).astype(int)
+
+
+def _boxes_scanned(shape, box_sizes):
+    """盒计数中扫描的盒子总数"""
+    return sum((shape[0] // s) * (shape[1] // s) for s in box_sizes)
+
+
+def _cases(quick):
+    """
+    生成所有基准用例
+    :param quick: 是否只使用较小的规模
+    :return: 列表，每项为(名称, 参数, setup函数)；setup返回(被测函数, 工作量, 单位)
+    """
+    segment = np.array([0, 1], dtype=complex)
+    koch_rules = {'F': 'F+F--F+F'}
+    tree_rules = {'1': '11', '0': '1[0]0'}
+    sizes = (100, 200) if quick else (200, 400, 800)
+    cases = []
+
+    for level in ((3, 4) if quick else (4, 5, 6)):
+        cases.append(('koch_generator', level, lambda level=level: (
+            lambda: koch_generator(segment, level), 4 ** level + 1, 'points/s')))
+    for level in ((2, 3) if quick else (2, 3, 4)):
+        cases.append(('minkowski_generator', level, lambda level=level: (
+            lambda: minkowski_generator(segment, level), 9 * 10 ** (level - 1), 'points/s')))
+    for n in ((4, 5) if quick else (5, 6, 7)):
+        cases.append(('apply_rules', n, lambda n=n: (
+            lambda: apply_rules('F', koch_rules, n), len(apply_rules('F', koch_rules, n)), 'chars/s')))
+    for n in ((6, 8) if quick else (8, 10, 12)):
+        def setup(n=n):
+            commands = apply_rules('0', tree_rules, n)
+            work = commands.count('0') + commands.count('1')
+            return lambda: l_system_segments(commands, 45, 1, tree_mode=True), work, 'segments/s'
+        cases.append(('l_system_segments', n, setup))
+    for n in ((1000, 5000) if quick else (5000, 20000)):
+        cases.append(('run_ifs', n, lambda n=n: (
+            lambda: run_ifs(get_fern_params(), num_points=n), n, 'points/s')))
+    for size in sizes:
+        cases.append(('generate_mandelbrot', size, lambda size=size: (
+            lambda: generate_mandelbrot(size, size, 100), size * size, 'pixels/s')))
+        cases.append(('generate_julia', size, lambda size=size: (
+            lambda: generate_julia(-0.8 + 0.156j, size, size, 100), size * size, 'pixels/s')))
+    for size in ((256, 512) if quick else (512, 1024, 2048)):
+        def setup(size=size):
+            image = _random_image(size)
+            box_sizes = [2 ** k for k in range(int(np.log2(size)))]
+            return lambda: box_count(image, box_sizes), _boxes_scanned(image.shape, box_sizes), 'boxes/s'
+        cases.append(('box_count', size, setup))
+
+        def setup(size=size):
+            image = _random_image(size)
+            return lambda: calculate_fractal_dimension(image), size * size, 'pixels/s'
+        cases.append(('calculate_fractal_dimension', size, setup))
+    return cases
+
+
+def measure(func, repeat, min_time=0.2):
+    """
+    测量一个函数
+    :param func: 无参数的被测函数
+    :param repeat: 计时轮数
+    :param min_time: 每轮计时的最短时长(秒)，不足时加倍每轮的调用次数
+    :return: (单次调用的最短墙钟时间(秒), 每轮调用次数, 峰值内存(字节))
+    """
+    timer = timeit.Timer(func)
+    loops = 1
+    while True:
+        elapsed = timer.timeit(loops)
+        if elapsed >= min_time:
+            break
+        loops *= 2
+    # 确定调用次数的几轮同时用作预热，不计入结果
+    times = timer.repeat(repeat, loops)
+    # tracemalloc会拖慢执行，峰值内存单独跑一次测量
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times) / loops, loops, peak
+
+
+def run(quick=False, repeat=3, only=None, min_time=0.2):
+    """
+    运行基准测试
+    :param quick: 是否只使用较小的规模
+    :param repeat: 计时轮数
+    :param only: 只运行名称在该集合中的用例（默认全部）
+    :param min_time: 每轮计时的最短时长(秒)
+    :return: 可写入JSON的结果字典
+    """
+    results = []
+    for name, param, setup in _cases(quick):
+        if only and name not in only:
+            continue
+        func, work, unit = setup()
+        wall, loops, peak = measure(func, repeat, min_time)
+        results.append({
+            'name': name,
+            'param': param,
+            'wall_time': wall,
+            'loops': loops,
+            'peak_memory': peak,
+            'throughput': work / wall if wall > 0 else float('inf'),
+            'unit': unit,
+        })
+        print(f"{name:<28} {param:>7} {wall:>10.4f}s {peak / 2 ** 20:>9.2f}MiB "
+              f"{results[-1]['throughput']:>14.4g} {unit}")
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'quick': quick,
+            'repeat': repeat,
+            'min_time': min_time,
+        },
+        'results': results,
+    }
+
+
+def compare(old, new, threshold=1.2, memory_threshold=1.2):
+    """
+    比较两次基准测试结果
+    :param old: 基线结果字典
+    :param new: 新结果字典
+    :param threshold: 耗时比值(新/旧)超过该值视为回归
+    :param memory_threshold: 峰值内存比值超过该值视为回归
+    :return: (rows, missing)：rows的每项为(名称, 参数, 耗时比值, 内存比值, 是否回归)，
+             只包含两次都有的用例；missing为基线中有、新结果中没有的(名称, 参数)列表
+    """
+    current = {(r['name'], r['param']): r for r in new['results']}
+    rows, missing = [], []
+    for before in old['results']:
+        key = (before['name'], before['param'])
+        result = current.get(key)
+        if result is None:
+            missing.append(key)
+            continue
+        time_ratio = result['wall_time'] / max(before['wall_time'], 1e-12)
+        memory_ratio = result['peak_memory'] / max(before['peak_memory'], 1)
+        regressed = time_ratio > threshold or memory_ratio > memory_threshold
+        rows.append((*key, time_ratio, memory_ratio, regressed))
+    return rows, missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="分形实验热点函数基准测试")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="运行基准测试并写入JSON")
+    run_parser.add_argument('-o', '--output', default='benchmark_results.json')
+    run_parser.add_argument('--quick', action='store_true', help="只使用较小的规模")
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--min-time', type=float, default=0.2, help="每轮计时的最短时长(秒)")
+    run_parser.add_argument('--only', nargs='*', help="只运行指定名称的用例")
+
+    compare_parser = commands.add_parser('compare', help="比较两次结果并标记回归")
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=1.2)
+    compare_parser.add_argument('--memory-threshold', type=float, default=1.2)
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        report = run(args.quick, args.repeat, set(args.only) if args.only else None, args.min_time)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"结果已写入 {args.output}")
+        return 0
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    rows, missing = compare(old, new, args.threshold, args.memory_threshold)
+    for name, param, time_ratio, memory_ratio, regressed in rows:
+        flag = 'REGRESSION' if regressed else 'ok'
+        print(f"{name:<28} {param:>7} 耗时x{time_ratio:>6.2f} 内存x{memory_ratio:>6.2f}  {flag}")
+    for name, param in missing:
+        print(f"{name:<28} {param:>7} {'':>24}  MISSING")
+    return 1 if missing or any(row[-1] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+# 添加父目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_benchmarks import compare, main, measure, run  # noqa: E402
+
+
+def report(*results):
+    """由(名称, 参数, 耗时, 峰值内存)构造最小的结果字典"""
+    return {'meta': {}, 'results': [{'name': name, 'param': param, 'wall_time': wall, 'peak_memory': peak}
+                                    for name, param, wall, peak in results]}
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_compare(self):
+        """耗时或内存比值超过阈值才算回归，基线中有而新结果中没有的用例报告为缺失"""
+        old = report(('a', 1, 1.0, 1000), ('a', 2, 1.0, 1000), ('b', 1, 1.0, 1000), ('c', 1, 1.0, 1000))
+        new = report(('a', 1, 1.2, 1000), ('a', 2, 1.3, 1000), ('b', 1, 0.5, 1300), ('d', 1, 1.0, 1000))
+        rows, missing = compare(old, new, threshold=1.2, memory_threshold=1.2)
+        self.assertEqual([(name, param, regressed) for name, param, _, _, regressed in rows],
+                         [('a', 1, False), ('a', 2, True), ('b', 1, True)])
+        self.assertAlmostEqual(rows[1][2], 1.3)
+        self.assertAlmostEqual(rows[2][3], 1.3)
+        self.assertEqual(missing, [('c', 1)])
+        rows, missing = compare(old, old)
+        self.assertEqual([row[2:] for row in rows], [(1.0, 1.0, False)] * 4)
+        self.assertEqual(missing, [])
+
+    def test_compare_command(self):
+        """compare命令在没有回归和缺失时返回0，否则返回1"""
+        old = report(('a', 1, 1.0, 1000), ('b', 1, 1.0, 1000))
+        with tempfile.TemporaryDirectory() as directory:
+            paths = {}
+            for label, data in (('old', old), ('same', old), ('missing', report(('a', 1, 1.0, 1000)))):
+                paths[label] = os.path.join(directory, label + '.json')
+                with open(paths[label], 'w') as f:
+                    json.dump(data, f)
+            with redirect_stdout(io.StringIO()) as output:
+                self.assertEqual(main(['compare', paths['old'], paths['same']]), 0)
+                self.assertEqual(main(['compare', paths['old'], paths['missing']]), 1)
+            self.assertIn('MISSING', output.getvalue())
+
+    def test_measure_repeats_fast_functions(self):
+        """很快的函数在一轮中被调用多次，直到这一轮至少min_time秒"""
+        calls = []
+        wall, loops, peak = measure(lambda: calls.append(None), repeat=2, min_time=0.01)
+        self.assertGreater(loops, 1)
+        self.assertGreaterEqual(len(calls), 3 * loops)
+        self.assertLess(wall, 0.01)
+        self.assertGreaterEqual(peak, 0)
+
+    def test_run_schema(self):
+        """run的结果可以写成JSON，并包含compare需要的字段"""
+        with redirect_stdout(io.StringIO()):
+            data = json.loads(json.dumps(run(quick=True, repeat=1, only={'apply_rules'}, min_time=0.001)))
+        self.assertEqual(set(data['meta']), {'timestamp', 'python', 'numpy', 'platform', 'quick', 'repeat', 'min_time'})
+        self.assertEqual([r['param'] for r in data['results']], [4, 5])
+        for result in data['results']:
+            self.assertEqual(set(result), {'name', 'param', 'wall_time', 'loops', 'peak_memory', 'throughput', 'unit'})
+            self.assertEqual(result['name'], 'apply_rules')
+            self.assertGreater(result['throughput'], 0)
+        self.assertEqual(compare(data, data)[1], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+"""
+各实验热点函数的可选仪表（计时与计数）
+
+默认关闭。热点函数先检查 instrumentation.enabled 再记录，关闭时每次调用只多一次属性读取。
+
+用法：
+    import instrumentation
+
+    with instrumentation.Collector() as stats:
+        generate_mandelbrot(800, 800, 100)
+    print(stats.to_json())
+
+    # 或者注册回调，逐条接收事件 (kind, name, value)，kind为'count'、'observe'或'time'
+    instrumentation.register_callback(print)
+
+只记录当前进程中的事件，进程池中的工作进程不会汇报给父进程。
+"""
+
+import contextlib
+import json
+import logging
+import time
+
+# 是否有活动的收集器或回调；热点函数据此跳过记录
+enabled = False
+
+_collectors = []
+_callbacks = []
+_NULL_STAGE = contextlib.nullcontext()
+
+
+def _refresh():
+    global enabled
+    enabled = bool(_collectors or _callbacks)
+
+
+def _emit(kind, name, value):
+    for collector in _collectors:
+        collector._record(kind, name, value)
+    for callback in _callbacks:
+        callback(kind, name, value)
+
+
+def count(name, value=1):
+    """累加计数器name"""
+    if enabled:
+        _emit('count', name, value)
+
+
+def observe(name, value):
+    """记录一个观测值（如每次重写后的字符串长度），按顺序保存"""
+    if enabled:
+        _emit('observe', name, value)
+
+
+class _Stage:
+    """计时上下文，退出时记录耗时"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _emit('time', self.name, time.perf_counter() - self.start)
+        return False
+
+
+def stage(name):
+    """
+    为一段代码计时
+    :param name: 阶段名称
+    :return: 上下文管理器；未启用时返回共享的空上下文
+    """
+    return _Stage(name) if enabled else _NULL_STAGE
+
+
+def register_callback(callback):
+    """注册回调callback(kind, name, value)，同时启用仪表"""
+    _callbacks.append(callback)
+    _refresh()
+
+
+def unregister_callback(callback):
+    """注销回调"""
+    _callbacks.remove(callback)
+    _refresh()
+
+
+class Collector:
+    """
+    收集计数、观测值和各阶段耗时的上下文管理器
+
+    属性：
+    counters -- {名称: 累计值}
+    observations -- {名称: 观测值列表}
+    timings -- {阶段名称: {'total': 总耗时(秒), 'calls': 调用次数}}
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.observations = {}
+        self.timings = {}
+
+    def __enter__(self):
+        _collectors.append(self)
+        _refresh()
+        return self
+
+    def __exit__(self, *exc):
+        _collectors.remove(self)
+        _refresh()
+        return False
+
+    def _record(self, kind, name, value):
+        if kind == 'count':
+            self.counters[name] = self.counters.get(name, 0) + value
+        elif kind == 'observe':
+            self.observations.setdefault(name, []).append(value)
+        else:
+            timing = self.timings.setdefault(name, {'total': 0.0, 'calls': 0})
+            timing['total'] += value
+            timing['calls'] += 1
+
+    def to_dict(self):
+        """导出为字典"""
+        return {
+            'counters': dict(self.counters),
+            'observations': {name: list(values) for name, values in self.observations.items()},
+            'timings': {name: dict(timing) for name, timing in self.timings.items()},
+        }
+
+    def to_json(self, path=None):
+        """
+        导出为JSON
+        :param path: 给出时同时写入该文件
+        :return: JSON字符串
+        """
+        text = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    def log(self, logger=None, level=logging.INFO):
+        """把收集到的数据逐条写入日志"""
+        logger = logger or logging.getLogger(__name__)
+        for name, value in sorted(self.counters.items()):
+            logger.log(level, "count %s = %s", name, value)
+        for name, values in sorted(self.observations.items()):
+            logger.log(level, "observe %s = %s", name, values)
+        for name, timing in sorted(self.timings.items()):
+            logger.log(level, "time %s = %.6fs over %d calls", name, timing['total'], timing['calls'])
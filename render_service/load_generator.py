@@ -0,0 +1,122 @@
+"""
+渲染服务的压力测试脚本(只依赖标准库)
+
+用法：
+python render_service/load_generator.py URL [URL ...] [-n 200] [-c 20] [--timeout 60] [--json]
+
+以固定并发数发送n个GET请求(多个URL时轮流使用)，结束后报告各状态码的次数、
+吞吐量和延迟的p50/p99。延迟从建立连接开始，到完整读出响应体为止。
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import time
+import urllib.parse
+
+
+async def fetch(url, timeout=60.0):
+    """
+    发送一个GET请求
+    :return: (状态码, 响应头字典(小写键), 响应体字节串)
+    """
+    async def _fetch():
+        parts = urllib.parse.urlsplit(url)
+        reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+        try:
+            target = parts.path or '/'
+            if parts.query:
+                target += '?' + parts.query
+            writer.write(f'GET {target} HTTP/1.1\r\nHost: {parts.netloc}\r\nConnection: close\r\n\r\n'
+                         .encode('latin-1'))
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            headers = {}
+            while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            if headers.get('transfer-encoding', '').lower() == 'chunked':
+                body = bytearray()
+                while (size := int((await reader.readline()).split(b';')[0], 16)) > 0:
+                    body += await reader.readexactly(size)
+                    await reader.readexactly(2)  # 数据块后的CRLF
+                await reader.readline()
+                body = bytes(body)
+            elif 'content-length' in headers:
+                body = await reader.readexactly(int(headers['content-length']))
+            else:
+                body = await reader.read()
+            return status, headers, body
+        finally:
+            writer.close()
+
+    return await asyncio.wait_for(_fetch(), timeout)
+
+
+def percentile(values, q):
+    """最近秩法计算百分位数，q取0~100"""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q / 100 * len(ordered)) - 1, 0)]
+
+
+async def run_load(urls, requests=200, concurrency=20, timeout=60.0):
+    """
+    以固定并发数发送请求
+    :return: 统计字典 {'requests', 'status', 'errors', 'elapsed', 'throughput', 'p50', 'p99', 'mean'}
+             延迟单位为秒，只统计收到响应的请求
+    """
+    latencies = []
+    status = {}
+    errors = 0
+    next_index = 0
+
+    async def client():
+        nonlocal next_index, errors
+        while next_index < requests:
+            url = urls[next_index % len(urls)]
+            next_index += 1
+            start = time.perf_counter()
+            try:
+                code, _, _ = await fetch(url, timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError):
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            status[code] = status.get(code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(min(concurrency, requests))))
+    elapsed = time.perf_counter() - start
+    summary = {'requests': requests, 'status': status, 'errors': errors, 'elapsed': elapsed,
+               'throughput': len(latencies) / elapsed if elapsed > 0 else 0.0}
+    if latencies:
+        summary.update(p50=percentile(latencies, 50), p99=percentile(latencies, 99),
+                       mean=sum(latencies) / len(latencies))
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('urls', nargs='+')
+    parser.add_argument('-n', '--requests', type=int, default=200, help='请求总数')
+    parser.add_argument('-c', '--concurrency', type=int, default=20, help='并发连接数')
+    parser.add_argument('--timeout', type=float, default=60.0, help='单个请求的超时(秒)')
+    parser.add_argument('--json', action='store_true', help='以JSON输出统计结果')
+    args = parser.parse_args(argv)
+
+    summary = asyncio.run(run_load(args.urls, args.requests, args.concurrency, args.timeout))
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    print(f"{summary['requests']} requests, concurrency {args.concurrency}, {summary['elapsed']:.2f} s, "
+          f"{summary['throughput']:.1f} req/s")
+    print("status: " + ", ".join(f"{code}={n}" for code, n in sorted(summary['status'].items()))
+          + f", errors={summary['errors']}")
+    if 'p50' in summary:
+        print(f"latency: p50 {summary['p50'] * 1000:.1f} ms, p99 {summary['p99'] * 1000:.1f} ms, "
+              f"mean {summary['mean'] * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,462 @@
+"""
+分形渲染HTTP服务：只依赖标准库asyncio，计算交给进程池
+
+用法：
+python render_service/server.py [--host 127.0.0.1] [--port 8000] [--workers N] [--max-queue 16]
+
+接口（GET，参数放在查询字符串中，均可省略）：
+/mandelbrot?width=&height=&max_iter=&xmin=&xmax=&ymin=&ymax=&cmap=
+/julia?c_real=&c_imag=&width=&height=&max_iter=&xmin=&xmax=&ymin=&ymax=&cmap=
+/ifs?name=fern|tree&num_points=&num_skip=&seed=&width=&height=&cmap=
+/lsystem?preset=koch|tree&iterations=&width=&height=&cmap=
+    或 /lsystem?axiom=F&rules=F:F+F--F+F&angle=60&initial_angle=0&tree_mode=0&iterations=
+/stats 返回请求、计算、合并和拒绝次数(JSON)
+
+参数完全相同的并发请求合并到同一次计算上；正在进行的不同计算达到max_queue个时，
+新的计算请求直接返回503（附Retry-After），不在服务端排队。
+Mandelbrot/Julia图像按BAND_ROWS行一块在工作进程中计算并压缩，每压缩完一块就以
+分块传输编码(chunked)发送，服务进程只保存已压缩的数据，不保存整幅图像；
+IFS和L系统的点密度需要全部点才能确定，只能整幅渲染后再发送。
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import sys
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# 把L系统、IFS和Mandelbrot/Julia三个实验目录加入Python路径，以便导入各实验的模块
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))  # 仓库根目录下的仪表模块instrumentation
+for prefix in ('Exp2-', 'Exp3-', 'Exp4-'):
+    for directory in sorted(ROOT.glob(prefix + '*')):
+        sys.path.insert(0, str(directory))
+
+from L_system import apply_rules, l_system_segments  # noqa: E402
+from ifs import get_fern_params, get_tree_params, run_ifs  # noqa: E402
+from mandelbrot_julia import (JULIA_BOUNDS, MANDELBROT_BOUNDS, colorize, colormap_lut,  # noqa: E402
+                              compress_png_rows, escape_time_rows, png_header, png_trailer)
+
+MAX_PIXELS = 4_000_000
+MAX_ITER = 10_000
+MAX_IFS_POINTS = 1_000_000
+MAX_LSYSTEM_COMMANDS = 2_000_000
+# 逃逸时间图像每个行块的行数，以及每个请求同时提交给进程池的行块数
+BAND_ROWS = 64
+PREFETCH_BANDS = 4
+
+IFS_PRESETS = {'fern': get_fern_params, 'tree': get_tree_params}
+LSYSTEM_PRESETS = {
+    'koch': {'axiom': 'F', 'rules': 'F:F+F--F+F', 'angle': 60.0, 'initial_angle': 0.0,
+             'tree_mode': False, 'iterations': 4},
+    'tree': {'axiom': '0', 'rules': '1:11,0:1[0]0', 'angle': 45.0, 'initial_angle': 90.0,
+             'tree_mode': True, 'iterations': 7},
+}
+
+_COMMON = {'width': (int, 400), 'height': (int, 400), 'cmap': (str, 'magma')}
+PARAMETERS = {
+    'mandelbrot': {**_COMMON, 'max_iter': (int, 100),
+                   'xmin': (float, MANDELBROT_BOUNDS[0]), 'xmax': (float, MANDELBROT_BOUNDS[1]),
+                   'ymin': (float, MANDELBROT_BOUNDS[2]), 'ymax': (float, MANDELBROT_BOUNDS[3])},
+    'julia': {**_COMMON, 'max_iter': (int, 100), 'c_real': (float, -0.8), 'c_imag': (float, 0.156),
+              'xmin': (float, JULIA_BOUNDS[0]), 'xmax': (float, JULIA_BOUNDS[1]),
+              'ymin': (float, JULIA_BOUNDS[2]), 'ymax': (float, JULIA_BOUNDS[3])},
+    'ifs': {**_COMMON, 'name': (str, 'fern'), 'num_points': (int, 50000), 'num_skip': (int, 100),
+            'seed': (int, 0)},
+    'lsystem': {**_COMMON, 'preset': (str, 'koch'), 'axiom': (str, None), 'rules': (str, None),
+                'angle': (float, None), 'initial_angle': (float, None), 'tree_mode': (bool, None),
+                'iterations': (int, None)},
+}
+
+
+class ServiceOverloaded(Exception):
+    """正在进行的计算数已达上限"""
+
+
+def _parse_bool(text):
+    if text.lower() in ('1', 'true', 'yes'):
+        return True
+    if text.lower() in ('0', 'false', 'no'):
+        return False
+    raise ValueError(f"Invalid boolean: {text}")
+
+
+def _parse_rules(text):
+    """把'F:F+F--F+F,X:F[X]'解析为重写规则字典"""
+    rules = {}
+    for item in text.split(','):
+        symbol, sep, replacement = item.partition(':')
+        if not sep or len(symbol) != 1:
+            raise ValueError(f"Invalid rule: {item}")
+        rules[symbol] = replacement
+    return rules
+
+
+def _lsystem_length(axiom, rules, iterations):
+    """不展开字符串，只按各符号的个数计算重写后的长度"""
+    counts = {}
+    for char in axiom:
+        counts[char] = counts.get(char, 0) + 1
+    for _ in range(iterations):
+        next_counts = {}
+        for char, n in counts.items():
+            for out in rules.get(char, char):
+                next_counts[out] = next_counts.get(out, 0) + n
+        counts = next_counts
+        if sum(counts.values()) > MAX_LSYSTEM_COMMANDS:
+            break
+    return sum(counts.values())
+
+
+def parse_params(kind, query):
+    """
+    校验并规范化查询参数
+    :param kind: 'mandelbrot'、'julia'、'ifs'或'lsystem'
+    :param query: {参数名: 字符串值}
+    :return: 补齐默认值后的参数字典，可直接作为合并请求的键
+    """
+    spec = PARAMETERS[kind]
+    unknown = set(query) - set(spec)
+    if unknown:
+        raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+    params = {}
+    for name, (kind_type, default) in spec.items():
+        if name not in query:
+            params[name] = default
+            continue
+        try:
+            params[name] = _parse_bool(query[name]) if kind_type is bool else kind_type(query[name])
+        except ValueError:
+            raise ValueError(f"Invalid value for {name}: {query[name]}") from None
+
+    if not (0 < params['width'] and 0 < params['height'] and params['width'] * params['height'] <= MAX_PIXELS):
+        raise ValueError(f"Image size must be positive and at most {MAX_PIXELS} pixels.")
+    try:
+        colormap_lut(params['cmap'], 2)
+    except KeyError:
+        raise ValueError(f"Unknown colormap: {params['cmap']}") from None
+
+    if kind in ('mandelbrot', 'julia'):
+        if not 0 < params['max_iter'] <= MAX_ITER:
+            raise ValueError(f"max_iter must be in 1..{MAX_ITER}.")
+        if not (params['xmin'] < params['xmax'] and params['ymin'] < params['ymax']):
+            raise ValueError("Bounds must satisfy xmin < xmax and ymin < ymax.")
+    elif kind == 'ifs':
+        if params['name'] not in IFS_PRESETS:
+            raise ValueError(f"Unknown IFS: {params['name']}")
+        if not 0 < params['num_points'] <= MAX_IFS_POINTS or params['num_skip'] < 0:
+            raise ValueError(f"num_points must be in 1..{MAX_IFS_POINTS} and num_skip non-negative.")
+    else:
+        if params['preset'] not in LSYSTEM_PRESETS:
+            raise ValueError(f"Unknown L-system preset: {params['preset']}")
+        # 未给出的L系统参数取预设值，规范化后相同的请求得到相同的键
+        preset = params.pop('preset')
+        for name, value in LSYSTEM_PRESETS[preset].items():
+            if params[name] is None:
+                params[name] = value
+        if params['iterations'] < 0:
+            raise ValueError("iterations must be non-negative.")
+        length = _lsystem_length(params['axiom'], _parse_rules(params['rules']), params['iterations'])
+        if length > MAX_LSYSTEM_COMMANDS:
+            raise ValueError(f"The L-system expands to more than {MAX_LSYSTEM_COMMANDS} commands.")
+    return params
+
+
+def _fit_to_pixels(x, y, width, height, margin=2):
+    """等比例缩放并居中，把坐标映射到像素坐标"""
+    xmin, xmax, ymin, ymax = x.min(), x.max(), y.min(), y.max()
+    scale = min((width - 1 - 2 * margin) / max(xmax - xmin, 1e-12),
+                (height - 1 - 2 * margin) / max(ymax - ymin, 1e-12))
+    scale = max(scale, 0.0)
+    x0 = (width - 1 - scale * (xmax - xmin)) / 2 - scale * xmin
+    y0 = (height - 1 - scale * (ymax - ymin)) / 2 - scale * ymin
+    return lambda u, v: (u * scale + x0, v * scale + y0)
+
+
+def _raster(px, py, width, height):
+    """统计每个像素上的点数，返回形状(width, height)的数组(方向与generate_mandelbrot相同)"""
+    ix = np.clip(np.rint(px).astype(np.intp), 0, width - 1)
+    iy = np.clip(np.rint(py).astype(np.intp), 0, height - 1)
+    return np.bincount(ix * height + iy, minlength=width * height).reshape(width, height)
+
+
+def _segment_raster(segments, width, height):
+    """沿每条线段按不超过1像素的间距采样，栅格化整幅L系统图形"""
+    transform = _fit_to_pixels(segments[:, [0, 2]].ravel(), segments[:, [1, 3]].ravel(), width, height)
+    x0, y0 = transform(segments[:, 0], segments[:, 1])
+    x1, y1 = transform(segments[:, 2], segments[:, 3])
+    samples = np.ceil(np.hypot(x1 - x0, y1 - y0)).astype(np.intp) + 1
+    index = np.repeat(np.arange(len(segments)), samples)
+    # 每条线段内部的采样序号0..samples-1，换算成参数t
+    offsets = np.arange(index.size) - np.repeat(np.cumsum(samples) - samples, samples)
+    t = offsets / np.maximum(samples[index] - 1, 1)
+    px = x0[index] + t * (x1 - x0)[index]
+    py = y0[index] + t * (y1 - y0)[index]
+    return _raster(px, py, width, height) > 0
+
+
+def bands(kind, params):
+    """图像按行分块的方式：逃逸时间图像每BAND_ROWS行一块，点密度图像整幅一块"""
+    height = params['height']
+    if kind in ('mandelbrot', 'julia'):
+        return [(row, min(row + BAND_ROWS, height)) for row in range(0, height, BAND_ROWS)]
+    return [(0, height)]
+
+
+def render_band(kind, params, row0, row1):
+    """
+    在工作进程中渲染图像的第row0到row1-1行并压缩
+    :return: compress_png_rows的结果(IDAT数据块, adler32, 字节数)
+    """
+    width, height = params['width'], params['height']
+    lut = colormap_lut(params['cmap'])
+    if kind in ('mandelbrot', 'julia'):
+        bounds = (params['xmin'], params['xmax'], params['ymin'], params['ymax'])
+        c = complex(params['c_real'], params['c_imag']) if kind == 'julia' else None
+        data = escape_time_rows(kind, width, height, params['max_iter'], bounds, row0, row1, c)
+        rgb = colorize(data, lut, vmin=0, vmax=params['max_iter'])
+    elif kind == 'ifs':
+        np.random.seed(params['seed'])
+        points = run_ifs(IFS_PRESETS[params['name']](), params['num_points'], params['num_skip'])
+        transform = _fit_to_pixels(points[:, 0], points[:, 1], width, height)
+        density = np.log1p(_raster(*transform(points[:, 0], points[:, 1]), width, height))
+        rgb = colorize(density, lut, vmin=0)
+    elif kind == 'lsystem':
+        commands = apply_rules(params['axiom'], _parse_rules(params['rules']), params['iterations'])
+        segments = l_system_segments(commands, params['angle'], 1.0, initial_angle=params['initial_angle'],
+                                     tree_mode=params['tree_mode'], merge=True)
+        if len(segments) == 0:
+            raise ValueError("The L-system draws no segments.")
+        rgb = colorize(_segment_raster(segments, width, height).astype(float), lut, vmin=0, vmax=1)
+    else:
+        raise ValueError(f"Unknown fractal type: {kind}")
+    return compress_png_rows(rgb)
+
+
+def render(kind, params):
+    """
+    在当前进程中逐块渲染一幅图像
+    :return: PNG字节片段列表，拼接后即完整的PNG文件(与服务发送的内容相同)
+    """
+    pieces = [render_band(kind, params, row0, row1) for row0, row1 in bands(kind, params)]
+    return ([png_header(params['width'], params['height'])] + [idat for idat, _, _ in pieces]
+            + [png_trailer([(adler, size) for _, adler, size in pieces])])
+
+
+class RenderJob:
+    """
+    一次正在进行的渲染，参数相同的请求共享同一个RenderJob
+
+    已编码的PNG片段按顺序追加到chunks中，后加入的请求也从头读取；
+    第一个片段包含文件头和第一个行块，渲染出错时stream()抛出相应的异常
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self._changed = asyncio.Event()
+
+    def _publish(self, chunk=None, error=None, done=False):
+        """追加一个片段或记录结束/出错，并唤醒所有等待的stream()"""
+        if chunk is not None:
+            self.chunks.append(chunk)
+        self.error, self.done = error, done
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def stream(self):
+        """异步生成器，依次给出PNG字节片段"""
+        index = 0
+        while True:
+            changed = self._changed
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.error is not None:
+                raise self.error
+            if self.done:
+                return
+            await changed.wait()
+
+
+class RenderService:
+    """
+    HTTP渲染服务
+
+    属性：
+    max_queue -- 同时进行的不同计算数上限
+    stats -- 请求统计 {'requests', 'computed', 'coalesced', 'rejected', 'errors'}
+    """
+
+    def __init__(self, workers=None, max_queue=16, executor=None):
+        self.executor = executor if executor is not None else ProcessPoolExecutor(workers)
+        self.max_queue = max_queue
+        self.inflight = {}
+        self._tasks = set()
+        self.stats = {'requests': 0, 'computed': 0, 'coalesced': 0, 'rejected': 0, 'errors': 0}
+
+    def render(self, kind, params):
+        """
+        开始渲染一幅图像，参数相同的请求共享正在进行的渲染
+        :return: RenderJob
+        :raises ServiceOverloaded: 正在进行的渲染数已达max_queue
+        """
+        key = (kind, tuple(sorted(params.items())))
+        job = self.inflight.get(key)
+        if job is not None:
+            self.stats['coalesced'] += 1
+            return job
+        if len(self.inflight) >= self.max_queue:
+            self.stats['rejected'] += 1
+            raise ServiceOverloaded()
+        job = self.inflight[key] = RenderJob()
+        self.stats['computed'] += 1
+        # 渲染在独立的任务中进行，某个客户端断开时不影响其他共享它的请求
+        task = asyncio.get_running_loop().create_task(self._produce(job, kind, params))
+        self._tasks.add(task)
+
+        def finished(_):
+            self.inflight.pop(key, None)
+            self._tasks.discard(task)
+        task.add_done_callback(finished)
+        return job
+
+    async def _produce(self, job, kind, params):
+        """把各行块提交给进程池(最多同时PREFETCH_BANDS块)，按顺序把压缩结果交给job"""
+        loop = asyncio.get_running_loop()
+        remaining = iter(bands(kind, params))
+        pending = collections.deque()
+
+        def submit():
+            for row0, row1 in remaining:
+                pending.append(loop.run_in_executor(self.executor, render_band, kind, params, row0, row1))
+                return
+
+        for _ in range(PREFETCH_BANDS):
+            submit()
+        checksums = []
+        try:
+            while pending:
+                idat, adler, size = await pending.popleft()
+                submit()
+                if not checksums:
+                    idat = png_header(params['width'], params['height']) + idat
+                checksums.append((adler, size))
+                job._publish(idat)
+            job._publish(png_trailer(checksums), done=True)
+        except Exception as e:
+            for future in pending:
+                future.cancel()
+            job._publish(error=e)
+
+    async def handle(self, reader, writer):
+        """处理一个HTTP连接(每个连接一个请求)"""
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=10)
+            while (await asyncio.wait_for(reader.readline(), timeout=10)) not in (b'\r\n', b'\n', b''):
+                pass  # 不需要任何请求头
+            try:
+                method, target, _ = request_line.decode('latin-1').split()
+            except ValueError:
+                await self._respond(writer, 400, b'Malformed request line.\n')
+                return
+            url = urllib.parse.urlsplit(target)
+            kind = url.path.strip('/')
+            self.stats['requests'] += 1
+            if method != 'GET':
+                await self._respond(writer, 405, b'Only GET is supported.\n', [('Allow', 'GET')])
+            elif kind == 'stats':
+                body = json.dumps({**self.stats, 'inflight': len(self.inflight)}).encode()
+                await self._respond(writer, 200, body, [('Content-Type', 'application/json')])
+            elif kind not in PARAMETERS:
+                await self._respond(writer, 404, b'Not found.\n')
+            else:
+                await self._render_response(writer, kind, dict(urllib.parse.parse_qsl(url.query)))
+        except (ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _render_response(self, writer, kind, query):
+        try:
+            params = parse_params(kind, query)
+            stream = self.render(kind, params).stream()
+            # 第一个行块完成后才发送状态行，渲染出错时仍能返回错误状态码
+            first = await anext(stream)
+        except ServiceOverloaded:
+            await self._respond(writer, 503, b'Too many renders in progress.\n', [('Retry-After', '1')])
+            return
+        except ValueError as e:
+            self.stats['errors'] += 1
+            await self._respond(writer, 400, f'{e}\n'.encode())
+            return
+        except Exception as e:
+            self.stats['errors'] += 1
+            await self._respond(writer, 500, f'{type(e).__name__}: {e}\n'.encode())
+            return
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: image/png\r\n'
+                     b'Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n')
+        chunk = first
+        while chunk is not None:
+            writer.write(b'%X\r\n%s\r\n' % (len(chunk), chunk))
+            await writer.drain()
+            try:
+                chunk = await anext(stream, None)
+            except Exception:
+                # 状态行已经发出，只能不写结束块直接断开，客户端会发现响应不完整
+                self.stats['errors'] += 1
+                return
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    @staticmethod
+    async def _respond(writer, status, body, headers=()):
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                   500: 'Internal Server Error', 503: 'Service Unavailable'}
+        lines = [f'HTTP/1.1 {status} {reasons[status]}', f'Content-Length: {len(body)}', 'Connection: close']
+        if not any(name == 'Content-Type' for name, _ in headers):
+            lines.append('Content-Type: text/plain; charset=utf-8')
+        lines += [f'{name}: {value}' for name, value in headers]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+
+    async def start(self, host='127.0.0.1', port=8000):
+        """开始监听，返回asyncio.Server(port=0时由系统分配端口)"""
+        return await asyncio.start_server(self.handle, host, port)
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
+async def serve(host='127.0.0.1', port=8000, workers=None, max_queue=16):
+    service = RenderService(workers, max_queue)
+    server = await service.start(host, port)
+    print(f"Serving on http://{host}:{server.sockets[0].getsockname()[1]}/")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=None, help='进程池大小，默认CPU核数')
+    parser.add_argument('--max-queue', type=int, default=16, help='同时进行的不同计算数上限')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.max_queue))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+import asyncio
+import io
+import os
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+# 添加父目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server import RenderService, bands, parse_params, render  # noqa: E402
+from load_generator import fetch, percentile, run_load  # noqa: E402
+from mandelbrot_julia import colorize, colormap_lut, generate_mandelbrot  # noqa: E402
+
+
+class GatedExecutor(ThreadPoolExecutor):
+    """所有任务都先等待gate打开再执行，用来确定地让请求在计算完成前全部到达"""
+
+    def __init__(self):
+        super().__init__(2)
+        self.gate = threading.Event()
+
+    def submit(self, fn, *args, **kwargs):
+        return super().submit(self._run, fn, *args, **kwargs)
+
+    def _run(self, fn, *args, **kwargs):
+        self.gate.wait(30)
+        return fn(*args, **kwargs)
+
+
+class TestRenderService(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.loop = asyncio.new_event_loop()
+        cls.service = RenderService(workers=1, max_queue=2)
+        cls.server = cls.loop.run_until_complete(cls.service.start('127.0.0.1', 0))
+        cls.base = f"http://127.0.0.1:{cls.server.sockets[0].getsockname()[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.close()
+        cls.loop.run_until_complete(cls.server.wait_closed())
+        cls.service.close()
+        cls.loop.close()
+
+    def get(self, *paths):
+        async def fetch_all():
+            return await asyncio.gather(*(fetch(self.base + path) for path in paths))
+        return self.loop.run_until_complete(fetch_all())
+
+    def get_gated(self, paths, arrived, max_queue=2):
+        """在计算被阻塞的服务上并发请求paths，arrived(stats)为真(所有请求都已到达)后才放行计算"""
+        executor = GatedExecutor()
+        service = RenderService(max_queue=max_queue, executor=executor)
+
+        async def run():
+            server = await service.start('127.0.0.1', 0)
+            base = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+            try:
+                requests = [asyncio.ensure_future(fetch(base + path)) for path in paths]
+                while not arrived(service.stats):
+                    await asyncio.sleep(0.01)
+                executor.gate.set()
+                return await asyncio.gather(*requests)
+            finally:
+                server.close()
+                await server.wait_closed()
+        try:
+            return service.stats, self.loop.run_until_complete(asyncio.wait_for(run(), 30))
+        finally:
+            executor.gate.set()
+            service.close()
+
+    def test_parse_params(self):
+        """默认值补齐、预设展开，非法参数报错"""
+        params = parse_params('mandelbrot', {'width': '64'})
+        self.assertEqual((params['width'], params['height'], params['max_iter']), (64, 400, 100))
+        koch = parse_params('lsystem', {'preset': 'koch', 'iterations': '2'})
+        self.assertEqual(koch, parse_params('lsystem', {'axiom': 'F', 'rules': 'F:F+F--F+F', 'iterations': '2',
+                                                        'angle': '60', 'initial_angle': '0'}))
+        for kind, query in [('mandelbrot', {'width': 'x'}), ('mandelbrot', {'max_iter': '0'}),
+                            ('julia', {'colour': 'red'}), ('ifs', {'name': 'leaf'}),
+                            ('lsystem', {'preset': 'koch', 'iterations': '40'})]:
+            with self.assertRaises(ValueError):
+                parse_params(kind, query)
+
+    def test_render_png(self):
+        """渲染结果是尺寸正确的PNG"""
+        for kind, query in [('mandelbrot', {}), ('ifs', {'num_points': '2000'}), ('lsystem', {'preset': 'tree'})]:
+            query.update(width='48', height='32')
+            image = Image.open(io.BytesIO(b''.join(render(kind, parse_params(kind, query)))))
+            self.assertEqual(image.size, (48, 32))
+            self.assertGreater(np.asarray(image).std(), 0)
+        # 按行块压缩拼接的PNG与整幅着色的结果逐像素相同
+        params = parse_params('mandelbrot', {'width': '70', 'height': '150', 'max_iter': '50'})
+        self.assertGreater(len(bands('mandelbrot', params)), 1)
+        image = Image.open(io.BytesIO(b''.join(render('mandelbrot', params))))
+        expected = colorize(generate_mandelbrot(70, 150, 50), colormap_lut('magma'), vmin=0, vmax=50)
+        np.testing.assert_array_equal(np.asarray(image.convert('RGB')), expected)
+
+    def test_coalescing(self):
+        """相同的并发请求只计算一次，按行块流式发送的结果完全相同"""
+        path = '/julia?width=100&height=200&max_iter=50'
+        stats, responses = self.get_gated([path] * 4, lambda stats: stats['coalesced'] == 3)
+        self.assertTrue(all(status == 200 for status, _, _ in responses))
+        self.assertEqual(responses[0][1]['transfer-encoding'], 'chunked')
+        self.assertEqual(len({body for _, _, body in responses}), 1)
+        self.assertEqual(responses[0][2], b''.join(render('julia', parse_params('julia', dict(
+            width='100', height='200', max_iter='50')))))
+        self.assertEqual((stats['computed'], stats['coalesced']), (1, 3))
+
+    def test_backpressure_and_errors(self):
+        """超过队列上限返回503，参数错误返回400，未知路径返回404"""
+        paths = [f'/mandelbrot?width=30&height=30&max_iter={30 + i}' for i in range(3)]
+        stats, responses = self.get_gated(paths, lambda stats: stats['computed'] + stats['rejected'] == 3)
+        self.assertEqual(sorted(status for status, _, _ in responses), [200, 200, 503])
+        self.assertEqual(stats['rejected'], 1)
+        self.assertEqual(self.get('/mandelbrot?width=-1')[0][0], 400)
+        self.assertEqual(self.get('/nothing')[0][0], 404)
+        self.assertEqual(self.get('/stats')[0][0], 200)
+
+    def test_load_generator(self):
+        """压力测试脚本统计状态码和延迟百分位数"""
+        self.assertEqual(percentile([4, 1, 3, 2], 50), 2)
+        self.assertEqual(percentile([4, 1, 3, 2], 99), 4)
+        summary = self.loop.run_until_complete(
+            run_load([self.base + '/mandelbrot?width=32&height=32'], requests=6, concurrency=2))
+        self.assertEqual(summary['status'], {200: 6})
+        self.assertLessEqual(summary['p50'], summary['p99'])
+
+
+if __name__ == "__main__":
+    unittest.main()
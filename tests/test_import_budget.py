@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# (实验目录前缀, 计算模块)
+MODULES = [
+    ('Exp1-', 'Iteration_koch_minkowski'),
+    ('Exp2-', 'L_system'),
+    ('Exp3-', 'ifs'),
+    ('Exp4-', 'mandelbrot_julia'),
+    ('Exp5-', 'box_counting'),
+]
+
+
+class TestImportBudget(unittest.TestCase):
+    def test_compute_modules_skip_plotting(self):
+        """测试导入各实验的计算模块时不加载matplotlib.pyplot和PIL（绘图和读图在首次使用时才导入）"""
+        env = dict(os.environ, PYTHONPATH=str(ROOT))
+        for prefix, module in MODULES:
+            with self.subTest(module=module):
+                directory, = ROOT.glob(prefix + '*')
+                code = (f"import sys, {module}; "
+                        "print(' '.join(name for name in ('matplotlib.pyplot', 'PIL') if name in sys.modules))")
+                # 在新的解释器中导入，不受本进程已加载模块的影响
+                result = subprocess.run([sys.executable, "-c", code], cwd=directory, env=env,
+                                        capture_output=True, text=True, check=True)
+                self.assertEqual(result.stdout.split(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()